@@ -0,0 +1 @@
+"""Benchmarks and load tooling for the watcher."""
@@ -0,0 +1,178 @@
+"""
+End-to-end load harness for the watcher.
+
+Runs the real ``watcher.cli`` entry point (``--once``) against a local HTTP
+server serving evolving listing pages and a local SMTP sink. Every simulated
+hour each target's page churns (jobs appear, disappear and get re-priced)
+and one check cycle runs per target.
+
+Usage:
+    python -m benchmarks.load --targets 20 --hours 48 --rows 500
+    python -m benchmarks.load --report load_report.json
+
+Reports cycle latency percentiles, state DB growth, notifications sent,
+duplicate notifications and jobs that were never notified. Exits with
+status 1 on any duplicate, missed job or failed cycle.
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import typer
+from typer.testing import CliRunner
+
+from benchmarks.pages import churn, generate_listings, render_page
+from benchmarks.stubs import PageServer, SMTPSink
+from watcher import cli
+from watcher.parse import parse_html
+
+app = typer.Typer()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _target_address(index: int) -> str:
+    return f"target-{index}@watcher.test"
+
+
+def run_load(
+    targets: int,
+    hours: int,
+    rows: int,
+    churn_rate: float = 0.05,
+    workdir: Optional[Path] = None,
+) -> Dict:
+    """
+    Simulate ``hours`` hourly cycles across ``targets`` independent targets.
+
+    Each target has its own page and its own state DB, the way separate
+    cron deployments would.
+
+    Args:
+        targets: Number of watched pages
+        hours: Number of simulated hourly cycles
+        rows: Initial table rows per page
+        churn_rate: Fraction of rows added, removed and re-priced each hour
+        workdir: Directory for state DBs (a temporary one if not given)
+
+    Returns:
+        Report dictionary
+    """
+    tmp = None
+    if workdir is None:
+        tmp = tempfile.TemporaryDirectory()
+        workdir = Path(tmp.name)
+
+    runner = CliRunner()
+    edits = max(1, int(rows * churn_rate))
+    latencies: List[float] = []
+    failures = 0
+    expected: Dict[int, Set[str]] = {i: set() for i in range(targets)}
+    # Listings start tomorrow so none of them count as expired during the run
+    tomorrow = date.today() + timedelta(days=1)
+    listings = {i: generate_listings(rows, seed=i, base_date=tomorrow) for i in range(targets)}
+
+    try:
+        with PageServer() as server, SMTPSink() as sink:
+            started = time.perf_counter()
+            for hour in range(hours):
+                for i in range(targets):
+                    if hour:
+                        listings[i] = churn(
+                            listings[i], seed=hour * targets + i, added=edits, removed=edits, changed=edits
+                        )
+                    html = render_page(listings[i])
+                    server.set_page(f"/targets/{i}", html)
+                    expected[i].update(job.raw_text for job in parse_html(html))
+
+                    env = {
+                        "WATCH_URL": f"{server.base_url}/targets/{i}",
+                        "STATE_DB_PATH": str(workdir / f"target-{i}.db"),
+                        "SMTP_HOST": sink.host,
+                        "SMTP_PORT": str(sink.port),
+                        "SMTP_USER": "load",
+                        "SMTP_PASS": "load",
+                        "SMTP_STARTTLS": "false",
+                        "EMAIL_FROM": "watcher@watcher.test",
+                        "EMAIL_TO": _target_address(i),
+                    }
+                    cycle_start = time.perf_counter()
+                    result = runner.invoke(cli.app, ["--once"], env=env)
+                    latencies.append(time.perf_counter() - cycle_start)
+                    if result.exit_code != 0 or "ERROR" in result.output:
+                        failures += 1
+            elapsed = time.perf_counter() - started
+
+            notified: Dict[int, Counter] = {i: Counter() for i in range(targets)}
+            for msg in sink.messages:
+                index = int(re.search(r"target-(\d+)@", msg["To"]).group(1))
+                plain = next(part for part in msg.walk() if part.get_content_type() == "text/plain")
+                body = plain.get_payload(decode=True).decode("utf-8")
+                notified[index].update(re.findall(r"^Raw: (.*)$", body, re.MULTILINE))
+
+            duplicates = sum(n - 1 for counts in notified.values() for n in counts.values() if n > 1)
+            missed = sum(len(expected[i] - set(notified[i])) for i in range(targets))
+            db_bytes = sum(os.path.getsize(workdir / f"target-{i}.db") for i in range(targets))
+
+            return {
+                "targets": targets,
+                "hours": hours,
+                "rows": rows,
+                "cycles": len(latencies),
+                "failed_cycles": failures,
+                "elapsed_s": round(elapsed, 3),
+                "cycles_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                "latency_ms": {
+                    "p50": round(percentile(latencies, 50) * 1000, 2),
+                    "p90": round(percentile(latencies, 90) * 1000, 2),
+                    "p99": round(percentile(latencies, 99) * 1000, 2),
+                    "max": round(max(latencies, default=0.0) * 1000, 2),
+                },
+                "http_requests": server.requests,
+                "http_not_modified": server.not_modified,
+                "emails_sent": len(sink.messages),
+                "jobs_notified": sum(sum(counts.values()) for counts in notified.values()),
+                "duplicates": duplicates,
+                "missed": missed,
+                "db_bytes": db_bytes,
+                "db_bytes_per_target": db_bytes // targets if targets else 0,
+            }
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+
+@app.command()
+def main(
+    targets: int = typer.Option(10, help="Number of watched pages"),
+    hours: int = typer.Option(24, help="Simulated hourly cycles per target"),
+    rows: int = typer.Option(200, help="Initial table rows per page"),
+    churn_rate: float = typer.Option(0.05, help="Fraction of rows changed each hour"),
+    report: str = typer.Option("", help="Write the report as JSON to this file"),
+):
+    """Run the load harness and print a summary."""
+    result = run_load(targets, hours, rows, churn_rate)
+    print(json.dumps(result, indent=2))
+    if report:
+        Path(report).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+
+    if result["duplicates"] or result["missed"] or result["failed_cycles"]:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,177 @@
+"""Deterministic generator of brigoska.cz-style job listing pages."""
+
+import random
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from html import escape
+from typing import List
+
+TITLES = [
+    "Skladník", "Pomocník ve skladu", "Kompletace zásilek", "Úklid kanceláří",
+    "Roznos letáků", "Pomocná síla v kuchyni", "Inventura", "Balení dárků",
+    "Obsluha šatny", "Promotér", "Doplňování zboží", "Brigáda na festivalu",
+    "Stěhování nábytku", "Výpomoc na stavbě", "Třídění zásilek", "Hostesa",
+]
+
+CITIES = [
+    "Praha", "Brno", "Ostrava", "Plzeň", "Liberec", "Olomouc", "Pardubice",
+    "Zlín", "Kladno", "Jihlava", "Teplice", "Hradec Králové",
+]
+
+DAY_ABBREVS = ["Po", "Út", "St", "Čt", "Pá", "So", "Ne"]
+
+SHIFTS = [
+    ("06:00", "14:00", "8"),
+    ("08:00", "16:00", "8"),
+    ("14:00", "22:00", "8"),
+    ("09:00", "13:00", "4"),
+    ("18:00", "22:30", "4.5"),
+    ("22:00", "06:00", "8"),
+]
+
+BASE_DATE = date(2026, 2, 2)
+
+
+@dataclass(frozen=True)
+class Listing:
+    """One generated table row, before rendering to HTML."""
+
+    listing_id: int
+    title: str
+    city: str
+    day: date
+    shift: int
+    wage: int
+
+    @property
+    def day_of_week(self) -> str:
+        return DAY_ABBREVS[self.day.weekday()]
+
+    @property
+    def is_weekend(self) -> bool:
+        return self.day.weekday() >= 5
+
+
+def generate_listings(
+    count: int,
+    seed: int = 0,
+    start_id: int = 1,
+    base_date: date = BASE_DATE,
+) -> List[Listing]:
+    """
+    Generate job listings deterministically.
+
+    Args:
+        count: Number of listings
+        seed: Random seed; the same seed always yields the same listings
+        start_id: First listing id (ids are sequential)
+        base_date: Earliest listing date; dates span the following 120 days
+
+    Returns:
+        List of listings, roughly 2/7 of which fall on a weekend
+    """
+    rng = random.Random(seed)
+    return [_random_listing(rng, start_id + i, base_date) for i in range(count)]
+
+
+def _random_listing(rng: random.Random, listing_id: int, base_date: date) -> Listing:
+    return Listing(
+        listing_id=listing_id,
+        title=rng.choice(TITLES),
+        city=rng.choice(CITIES),
+        day=base_date + timedelta(days=rng.randrange(120)),
+        shift=rng.randrange(len(SHIFTS)),
+        wage=rng.randrange(150, 260),
+    )
+
+
+def churn(
+    listings: List[Listing],
+    seed: int,
+    added: int = 0,
+    removed: int = 0,
+    changed: int = 0,
+) -> List[Listing]:
+    """
+    Return a new listing set with some rows added, removed and changed.
+
+    Changed rows keep their position but get a different wage, which is
+    what the site does when it re-prices a shift (and yields a new job key).
+
+    Args:
+        listings: Current listings
+        seed: Random seed for picking rows
+        added: Number of new listings to append
+        removed: Number of listings to drop
+        changed: Number of listings to re-price
+
+    Returns:
+        New list of listings (the input is not modified)
+    """
+    rng = random.Random(seed)
+    result = list(listings)
+
+    for _ in range(min(removed, len(result))):
+        result.pop(rng.randrange(len(result)))
+
+    for _ in range(min(changed, len(result))):
+        i = rng.randrange(len(result))
+        result[i] = replace(result[i], wage=result[i].wage + rng.randrange(1, 40))
+
+    next_id = max((listing.listing_id for listing in listings), default=0) + 1
+    base_date = min((listing.day for listing in listings), default=BASE_DATE)
+    result.extend(_random_listing(rng, next_id + i, base_date) for i in range(added))
+    return result
+
+
+def render_row(listing: Listing) -> str:
+    """Render a single listing as a brigoska.cz table row."""
+    start, end, hours = SHIFTS[listing.shift]
+    return (
+        "<tr>"
+        f'<td class="title"><a href="/cs/misto/{listing.listing_id}">» {escape(listing.title)}</a></td>'
+        f'<td class="city">{escape(listing.city)}</td>'
+        f'<td class="date">{listing.day.day}.{listing.day.month}.{listing.day.year} {listing.day_of_week}</td>'
+        f'<td class="time">{start} - {end} ({hours}h)</td>'
+        f'<td class="wage">{listing.wage}&nbsp;Kč/h</td>'
+        "</tr>"
+    )
+
+
+def render_page(listings: List[Listing]) -> str:
+    """
+    Render listings as a full page with the site's surrounding chrome.
+
+    Args:
+        listings: Listings to put in the jobs table
+
+    Returns:
+        HTML document
+    """
+    rows = "\n".join(render_row(listing) for listing in listings)
+    return f"""<!DOCTYPE html>
+<html lang="cs">
+<head>
+<meta charset="utf-8">
+<title>Volná místa | Brigoška</title>
+</head>
+<body>
+<nav><ul><li><a href="/cs">Úvod</a></li><li><a href="/cs/mista">Volná místa</a></li></ul></nav>
+<section id="mista">
+<h1>Volná místa</h1>
+<table class="jobs">
+<thead><tr><th>Pozice</th><th>Místo</th><th>Datum</th><th>Čas</th><th>Mzda</th></tr></thead>
+<tbody>
+{rows}
+</tbody>
+</table>
+</section>
+<footer><p>© Brigoška s.r.o. | Kontakt: info@example.cz | Tel. 123 456 789</p></footer>
+</body>
+</html>
+"""
+
+
+def generate_page(rows: int, seed: int = 0, base_date: date = BASE_DATE) -> str:
+    """Generate a full listing page with ``rows`` rows."""
+    return render_page(generate_listings(rows, seed=seed, base_date=base_date))
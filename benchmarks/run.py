@@ -0,0 +1,251 @@
+"""
+Benchmark suite for the parse → diff → store → notify pipeline.
+
+Usage:
+    python -m benchmarks.run                      # compare against baselines
+    python -m benchmarks.run --sizes 100,10000    # only some page sizes
+    python -m benchmarks.run --update             # rewrite the baselines
+
+Baselines live in benchmarks/baselines/<rows>.json. Each scenario runs at
+least ``--repeat`` times and until it has taken MIN_SCENARIO_S, so that
+millisecond scenarios get enough runs for a stable median. A scenario
+counts as a regression when its median time exceeds the baseline by more
+than the tolerance factor (and by more than a small absolute noise floor).
+"""
+
+import contextlib
+import io
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import typer
+
+from benchmarks.pages import churn, generate_listings, render_page
+from watcher import runner
+from watcher.diff import JobDiff, compute_diff
+from watcher.fetch import FetchResult
+from watcher.notify import render_body
+from watcher.parse import parse_html
+from watcher.store import JobStore
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+DEFAULT_SIZES = "100,10000,100000"
+NOISE_FLOOR_S = 0.005
+# Time spent on each scenario (setup included) before repeats stop; capped by MAX_REPEAT
+MIN_SCENARIO_S = 1.0
+MAX_REPEAT = 50
+URL = "https://brigoska.cz/cs/mista"
+
+app = typer.Typer()
+
+
+def _keyed(jobs) -> Dict:
+    return {job.job_key: job for job in jobs}
+
+
+def _cycle(store: JobStore, html: str, workdir: Path) -> None:
+    """
+    Run the cron check cycle (runner.check_all, then apply_retention) on a page.
+
+    The fetch is stubbed and the file channel writes to the work directory,
+    so claims, dispatch and re-post detection run as they do in cron.
+    """
+    config = {
+        **runner.get_config(),
+        "watch_urls": [URL],
+        "notify_channels": ["file"],
+        "notify_file": str(workdir / "notifications.jsonl"),
+        "near_dup_mode": "group",
+        "http_cache_mode": "off",
+        "snapshot_dir": "",
+        "stream_parse": False,
+        "watch_mode": "jobs",
+    }
+    fetch_page = runner.fetch_page
+    runner.fetch_page = lambda *args, **kwargs: FetchResult(status_code=200, text=html)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner.check_all(config, store)
+            runner.apply_retention(config, store)
+    finally:
+        runner.fetch_page = fetch_page
+
+
+def build_scenarios(rows: int, workdir: Path) -> Dict[str, Callable[[], Callable[[], None]]]:
+    """
+    Build the scenarios for one page size.
+
+    Each scenario is a setup function that prepares fresh inputs and returns
+    the callable to time, so setup cost never leaks into the measurement.
+    """
+    churn_rows = max(1, rows // 100)
+    old_listings = generate_listings(rows, seed=rows)
+    new_listings = churn(old_listings, seed=rows + 1, added=churn_rows, removed=churn_rows, changed=churn_rows)
+    old_html = render_page(old_listings)
+    new_html = render_page(new_listings)
+    old_jobs = parse_html(old_html)
+    new_jobs = parse_html(new_html)
+    counter = iter(range(10**9))
+
+    def fresh_db() -> JobStore:
+        return JobStore(str(workdir / f"bench-{next(counter)}.db"))
+
+    def warm_db() -> JobStore:
+        store = fresh_db()
+        store.upsert_jobs(old_jobs)
+        # Seed the notification ledger in one transaction; only the
+        # measured callables go through the per-job store API.
+        with sqlite3.connect(store.db_path) as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO notifications (job_key, change_type, notified_at) VALUES (?, 'new', ?)",
+                [(job.job_key, datetime.utcnow()) for job in old_jobs],
+            )
+        return store
+
+    def parse():
+        return lambda: parse_html(new_html)
+
+    def diff():
+        old, new = _keyed(old_jobs), _keyed(new_jobs)
+        return lambda: compute_diff(old, new)
+
+    def store_cold():
+        store = fresh_db()
+
+        def run():
+            store.upsert_jobs(new_jobs)
+            store.get_all_jobs()
+        return run
+
+    def store_warm():
+        store = warm_db()
+
+        def run():
+            store.upsert_jobs(new_jobs)
+            store.get_all_jobs()
+        return run
+
+    def notify_render():
+        all_new = JobDiff()
+        all_new.new = new_jobs
+        return lambda: render_body(all_new, URL)
+
+    # Listings that are not yet expired, or the cycle would drop them all
+    tomorrow = date.today() + timedelta(days=1)
+    live_old = generate_listings(rows, seed=rows, base_date=tomorrow)
+    live_new = churn(live_old, seed=rows + 1, added=churn_rows, removed=churn_rows, changed=churn_rows)
+    live_old_html = render_page(live_old)
+    live_new_html = render_page(live_new)
+
+    def full_cycle():
+        store = fresh_db()
+        _cycle(store, live_old_html, workdir)
+        return lambda: _cycle(store, live_new_html, workdir)
+
+    return {
+        "parse": parse,
+        "diff": diff,
+        "store_cold": store_cold,
+        "store_warm": store_warm,
+        "notify_render": notify_render,
+        "full_cycle": full_cycle,
+    }
+
+
+def measure(setup: Callable[[], Callable[[], None]], repeat: int) -> List[float]:
+    """
+    Time a scenario, each run on freshly set-up inputs.
+
+    Runs at least ``repeat`` times, then keeps going until MIN_SCENARIO_S
+    has passed (at most MAX_REPEAT runs).
+    """
+    timings: List[float] = []
+    started = time.perf_counter()
+    while len(timings) < repeat or (
+        len(timings) < MAX_REPEAT and time.perf_counter() - started < MIN_SCENARIO_S
+    ):
+        func = setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_size(rows: int, repeat: int) -> Dict[str, dict]:
+    """Run every scenario for one page size and return median timings."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        scenarios = build_scenarios(rows, Path(tmp))
+        for name, setup in scenarios.items():
+            timings = measure(setup, repeat)
+            results[name] = {
+                "median_s": round(statistics.median(timings), 6),
+                "min_s": round(min(timings), 6),
+                "repeat": len(timings),
+            }
+            print(f"  {name:<14} {results[name]['median_s'] * 1000:10.1f} ms")
+    return results
+
+
+def compare(rows: int, results: Dict[str, dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Return a human-readable line for every scenario that regressed."""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get("results", {}).get(name)
+        if not expected:
+            continue
+        current, reference = result["median_s"], expected["median_s"]
+        if current > reference * tolerance and current - reference > NOISE_FLOOR_S:
+            regressions.append(
+                f"{name}/{rows}: {current * 1000:.1f} ms vs baseline {reference * 1000:.1f} ms "
+                f"({current / reference:.2f}x)"
+            )
+    return regressions
+
+
+@app.command()
+def main(
+    sizes: str = typer.Option(DEFAULT_SIZES, help="Comma-separated page sizes (rows)"),
+    repeat: int = typer.Option(3, help="Runs per scenario; the median is reported"),
+    tolerance: float = typer.Option(1.5, help="Allowed slowdown factor before failing"),
+    update: bool = typer.Option(False, "--update", help="Write results as the new baselines"),
+):
+    """Run the benchmarks and compare them against the stored baselines."""
+    regressions = []
+    for rows in [int(s) for s in sizes.split(",") if s.strip()]:
+        print(f"Benchmarking {rows} rows...")
+        results = run_size(rows, repeat)
+        path = BASELINE_DIR / f"{rows}.json"
+
+        if update:
+            BASELINE_DIR.mkdir(exist_ok=True)
+            payload = {
+                "rows": rows,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }
+            path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+            print(f"  baseline written to {path}")
+        elif path.exists():
+            regressions += compare(rows, results, json.loads(path.read_text(encoding="utf-8")), tolerance)
+        else:
+            print(f"  no baseline at {path}, run with --update to create it")
+
+    if regressions:
+        print("\nPerformance regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,218 @@
+"""Local HTTP and SMTP stand-ins for load testing without real servers."""
+
+import hashlib
+import json
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+from email.message import Message
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Self
+
+
+class PageServer:
+    """
+    Serve in-memory HTML pages over HTTP on localhost.
+
+    Pages are set per path with ``set_page``; unknown paths return 404.
+    Responses carry a content ETag and honour If-None-Match with a 304.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.pages: Dict[str, bytes] = {}
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_page(self, path: str, html: str) -> None:
+        with self._lock:
+            self.pages[path] = html.encode("utf-8")
+
+    def _handler_class(self):
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with owner._lock:
+                    owner.requests += 1
+                    body = owner.pages.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with owner._lock:
+                        owner.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> Self:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class WebhookSink:
+    """
+    Accept JSON POSTs on localhost and keep every payload.
+
+    ``status`` and ``delay`` (seconds before answering) can be changed at
+    any time to simulate a failing or slow endpoint.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, status: int = 200, delay: float = 0.0):
+        self.payloads: List[dict] = []
+        self.status = status
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/hook"
+
+    def _handler_class(self):
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+                time.sleep(owner.delay)
+                if 200 <= owner.status < 300:
+                    with owner._lock:
+                        owner.payloads.append(json.loads(body))
+                self.send_response(owner.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> Self:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SMTPSink:
+    """
+    Minimal SMTP server that accepts any login and keeps every message.
+
+    Speaks just enough of the protocol for ``smtplib`` with STARTTLS turned
+    off: EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP and QUIT.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.messages: List[Message] = []
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def _store(self, data: bytes) -> None:
+        with self._lock:
+            self.messages.append(message_from_bytes(data))
+
+    def _handler_class(self):
+        owner = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str) -> None:
+                self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+            def handle(self):
+                self.reply("220 localhost SMTP sink")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode("utf-8", "replace").strip()
+                    verb = command.split(" ", 1)[0].upper()
+
+                    if verb in ("EHLO", "HELO"):
+                        self.reply("250-localhost")
+                        self.reply("250-AUTH PLAIN LOGIN")
+                        self.reply("250 8BITMIME")
+                    elif verb == "AUTH":
+                        if command.upper() == "AUTH LOGIN":
+                            self.reply("334 VXNlcm5hbWU6")
+                            self.rfile.readline()
+                            self.reply("334 UGFzc3dvcmQ6")
+                            self.rfile.readline()
+                        self.reply("235 Authentication successful")
+                    elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        owner._store(self._read_data())
+                        self.reply("250 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+            def _read_data(self) -> bytes:
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    if line.startswith(b".."):
+                        line = line[1:]
+                    lines.append(line)
+                return b"".join(lines)
+
+        return Handler
+
+    def __enter__(self) -> Self:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,136 @@
+"""Tests for the read-only JSON API."""
+
+import gzip
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Optional
+
+from watcher.api import ApiServer, JobCache
+from watcher.models import Job
+from watcher.store import JobStore
+
+
+def _job(title: str) -> Job:
+    job = Job(
+        title=title,
+        city="Brno",
+        date="10.10.2026",
+        day_of_week="So",
+        time_range="08:00 - 16:00",
+        duration_hours="8",
+        wage_czk_per_h="200 Kč/h",
+        raw_text=f"» {title} Brno 10.10.2026 So 08:00 - 16:00 (8h) 200 Kč/h",
+    )
+    job.job_key = job.compute_key()
+    return job
+
+
+def _get(url: str, headers: Optional[dict] = None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), b""
+
+
+def test_jobs_endpoint_uses_etags(tmp_path):
+    """Test that /jobs serves the cached listing and answers 304 while it is unchanged."""
+    store = JobStore(str(tmp_path / "state.db"))
+    store.upsert_jobs([_job("Skladník"), _job("Inventura")])
+    cache = JobCache()
+    cache.refresh(store)
+
+    with ApiServer(cache, port=0) as server:
+        status, headers, body = _get(f"{server.base_url}/jobs")
+        assert status == 200
+        assert [job["title"] for job in json.loads(body)] == ["Inventura", "Skladník"]
+
+        etag = headers["ETag"]
+        assert _get(f"{server.base_url}/jobs", {"If-None-Match": etag})[0] == 304
+
+        # A check that only moves last_seen keeps the ETag
+        store.upsert_jobs([_job("Skladník"), _job("Inventura")])
+        cache.refresh(store)
+        assert _get(f"{server.base_url}/jobs", {"If-None-Match": etag})[0] == 304
+
+        status, headers, body = _get(f"{server.base_url}/jobs", {"Accept-Encoding": "gzip"})
+        assert headers["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(body))) == 2
+        assert _get(f"{server.base_url}/nothing")[0] == 404
+
+
+def test_changes_long_poll(tmp_path):
+    """Test that a waiting /changes request is answered as soon as a refresh finds a change."""
+    store = JobStore(str(tmp_path / "state.db"))
+    old = _job("Skladník")
+    store.upsert_jobs([old])
+    cache = JobCache()
+    cache.refresh(store)  # initial load records no events
+
+    with ApiServer(cache, port=0) as server:
+        assert json.loads(_get(f"{server.base_url}/changes?since=0")[2]) == {
+            "epoch": cache.epoch, "cursor": 0, "events": [], "truncated": False,
+        }
+
+        results = []
+        poller = threading.Thread(
+            target=lambda: results.append(_get(f"{server.base_url}/changes?since=0&wait=10"))
+        )
+        poller.start()
+        new = _job("Inventura")
+        store.upsert_jobs([new])
+        store.mark_inactive([old.job_key])
+        cache.refresh(store)
+        poller.join(timeout=10)
+
+        changes = json.loads(results[0][2])
+        assert changes["cursor"] == 2
+        assert {(event["type"], event["job"]["title"]) for event in changes["events"]} == {
+            ("new", "Inventura"), ("removed", "Skladník"),
+        }
+        assert _get(f"{server.base_url}/changes?since=x")[0] == 400
+        for wait in ("nan", "inf", "-inf"):
+            assert _get(f"{server.base_url}/changes?since=0&wait={wait}")[0] == 400
+
+
+def test_changes_reports_truncation(tmp_path):
+    """Test that a client behind the retained event log is told it missed events."""
+    store = JobStore(str(tmp_path / "state.db"))
+    cache = JobCache(max_events=2)
+    cache.refresh(store)
+    store.upsert_jobs([_job("A"), _job("B"), _job("C")])
+    cache.refresh(store)
+
+    changes = cache.changes(since=0)
+    assert changes["truncated"] and len(changes["events"]) == 2
+    assert not cache.changes(since=1)["truncated"]
+
+
+def test_changes_after_restart(tmp_path):
+    """Test that cursors handed out before a restart are reported as truncated without waiting."""
+    store = JobStore(str(tmp_path / "state.db"))
+    before = JobCache()
+    before.refresh(store)
+    store.upsert_jobs([_job("A"), _job("B"), _job("C")])
+    before.refresh(store)
+    old = before.changes(since=0)
+    assert old["cursor"] == 3
+
+    restarted = JobCache()
+    restarted.refresh(store)
+    started = time.monotonic()
+    ahead = restarted.changes(since=old["cursor"], wait=5)
+    assert ahead["truncated"] and ahead["cursor"] == 0 and ahead["events"] == []
+    assert time.monotonic() - started < 1
+
+    store.upsert_jobs([_job("D"), _job("E"), _job("F"), _job("G")])
+    restarted.refresh(store)
+    # The new cursor has passed the old one: only the epoch tells them apart
+    other_epoch = restarted.changes(since=old["cursor"], epoch=old["epoch"])
+    assert other_epoch["truncated"] and len(other_epoch["events"]) == 4
+    current = restarted.changes(since=3, epoch=restarted.epoch)
+    assert not current["truncated"] and len(current["events"]) == 1
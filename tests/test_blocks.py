@@ -0,0 +1,92 @@
+"""Tests for block-level change detection of arbitrary pages."""
+
+import json
+
+from benchmarks.stubs import WebhookSink
+from watcher import runner
+from watcher.blocks import extract_lines, split_blocks
+from watcher.fetch import FetchResult
+from watcher.runner import check_once, get_config
+from watcher.store import JobStore
+
+URL = "http://example.invalid/news"
+
+
+def _page(paragraphs) -> str:
+    return (
+        "<html><head><title>News</title><script>var tracking = 1;</script></head><body>"
+        "<nav><ul><li><a href='/'>Home</a></li><li>About</li></ul></nav>"
+        + "".join(f"<p>{text}</p>" for text in paragraphs)
+        + "</body></html>"
+    )
+
+
+def test_blocks_ignore_markup_and_survive_insertions():
+    """Test that markup is ignored and an insertion only changes the block around it."""
+    paragraphs = [f"Item {i}: <b>price</b> {i * 7} <a href='/i/{i}'>Kč</a>" for i in range(300)]
+    lines = extract_lines(_page(paragraphs))
+    assert lines[:3] == ["Home", "About", "Item 0: price 0 Kč"] and "var tracking = 1;" not in lines
+    assert split_blocks(_page(paragraphs)) == split_blocks(_page(paragraphs).replace("/i/", "/item/"))
+
+    before = {block for block, _ in split_blocks(_page(paragraphs))}
+    after = {block for block, _ in split_blocks(_page(paragraphs[:10] + ["Breaking news"] + paragraphs[10:]))}
+    assert len(after - before) == len(before - after) == 1
+    assert len(before) > 20
+
+
+def test_block_mode_reports_added_and_removed_text(tmp_path, monkeypatch):
+    """Test that the first check is a baseline and later ones report changed text once."""
+    store = JobStore(str(tmp_path / "state.db"))
+    path = tmp_path / "changes.jsonl"
+    monkeypatch.setenv("WATCH_MODE", "blocks")
+    config = {**get_config(), "watch_url": URL, "notify_channels": ["file"], "notify_file": str(path)}
+    paragraphs = [f"Story number {i} about the town" for i in range(50)]
+    pages = iter([
+        _page(paragraphs),
+        _page(paragraphs[:20] + ["Road closed on Monday"] + paragraphs[21:]),
+        _page(paragraphs[:20] + ["Road closed on Monday"] + paragraphs[21:]).replace("<p>", "<p class='x'>"),
+    ])
+    monkeypatch.setattr(runner, "fetch_page", lambda *args, **kwargs: FetchResult(status_code=200, text=next(pages)))
+
+    assert check_once(config, store) is False
+    assert not path.exists()
+
+    assert check_once(config, store) is True
+    changes = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert {line["type"] for line in changes} == {"added", "removed"}
+    added = "\n".join(line["text"] for line in changes if line["type"] == "added")
+    removed = "\n".join(line["text"] for line in changes if line["type"] == "removed")
+    assert "Road closed on Monday" in added and "Story number 20 about the town" in removed
+    assert "Story number 20" not in added and "Road closed" not in removed
+
+    assert check_once(config, store) is False  # markup-only change
+    assert len(path.read_text(encoding="utf-8").splitlines()) == len(changes)
+
+
+def test_block_changes_are_retried_only_on_the_failed_channel(tmp_path, monkeypatch):
+    """Test that after a failed webhook only the webhook gets the block changes again."""
+    store = JobStore(str(tmp_path / "state.db"))
+    path = tmp_path / "changes.jsonl"
+    monkeypatch.setenv("WATCH_MODE", "blocks")
+    paragraphs = [f"Story number {i} about the town" for i in range(50)]
+    changed = _page(paragraphs[:20] + ["Road closed on Monday"] + paragraphs[21:])
+    pages = iter([_page(paragraphs), changed, changed, changed])
+    monkeypatch.setattr(runner, "fetch_page", lambda *args, **kwargs: FetchResult(status_code=200, text=next(pages)))
+
+    with WebhookSink(status=500) as hook:
+        config = {
+            **get_config(), "watch_url": URL, "notify_channels": ["file", "webhook"],
+            "webhook_url": hook.url, "notify_file": str(path),
+        }
+        check_once(config, store)
+        assert check_once(config, store) is True
+        sent = path.read_text(encoding="utf-8").splitlines()
+        assert sent and hook.payloads == []
+
+        hook.status = 200
+        assert check_once(config, store) is True
+        assert path.read_text(encoding="utf-8").splitlines() == sent
+        assert len(hook.payloads) == 1 and "Road closed on Monday" in "\n".join(hook.payloads[0]["added"])
+
+        assert check_once(config, store) is False  # blocks stored: nothing left to send
+    assert len(hook.payloads) == 1
@@ -0,0 +1,60 @@
+"""Tests for the on-disk HTTP record/replay cache."""
+
+import time
+from datetime import date, timedelta
+
+from benchmarks.pages import generate_page
+from benchmarks.stubs import PageServer
+from watcher.fetch import HEADERS, fetch_page, stream_page
+from watcher.httpcache import HttpCache
+from watcher.runner import check_all, check_once, get_config
+from watcher.store import JobStore
+
+
+def test_recorded_pages_replay_offline(tmp_path, monkeypatch):
+    """Test that a recorded run can be replayed with the server gone, for both fetch paths."""
+    cache_dir = str(tmp_path / "http")
+    page = generate_page(50, base_date=date.today() + timedelta(days=1))
+    monkeypatch.setenv("HTTP_CACHE_DIR", cache_dir)
+    monkeypatch.setenv("HTTP_CACHE_MODE", "record")
+    with PageServer() as server:
+        server.set_page("/mista", page)
+        url = f"{server.base_url}/mista"
+        config = {**get_config(), "watch_url": url, "notify_channels": []}
+        check_once(config, JobStore(str(tmp_path / "live.db")))
+    recorded = JobStore(str(tmp_path / "live.db")).get_all_jobs()
+    assert recorded and len(list((tmp_path / "http").rglob("*.json.gz"))) == 1
+
+    monkeypatch.setenv("HTTP_CACHE_MODE", "replay")
+    for stream in (False, True):
+        store = JobStore(str(tmp_path / f"replay-{stream}.db"))
+        check_once({**get_config(), "watch_url": url, "notify_channels": [], "stream_parse": stream}, store)
+        assert store.get_all_jobs().keys() == recorded.keys()
+
+    assert fetch_page(f"{url}/other", cache=HttpCache(cache_dir, "replay")) is None
+
+
+def test_cache_ttl_validators_and_in_run_sharing(tmp_path):
+    """Test that fresh entries skip the network and answer validators, and expired ones do not."""
+    with PageServer() as server:
+        server.set_page("/mista", generate_page(5))
+        url = f"{server.base_url}/mista"
+        cache = HttpCache(str(tmp_path / "http"), "record", ttl=60)
+
+        first = fetch_page(url, cache=cache)
+        again = fetch_page(url, cache=HttpCache(str(tmp_path / "http"), "record", ttl=60))
+        assert server.requests == 1 and again.text == first.text
+        assert fetch_page(url, etag=first.etag, cache=cache).not_modified
+        with stream_page(url, cache=cache) as streamed:
+            assert "".join(streamed.chunks) == first.text
+        assert server.requests == 1
+
+        time.sleep(0.05)
+        assert HttpCache(str(tmp_path / "http"), "record", ttl=0.01).get(url, HEADERS) is None
+        assert HttpCache(str(tmp_path / "http"), "record", ttl=0).get(url, HEADERS)["text"] == first.text
+
+        # The same target twice in one run is fetched once, even without a disk cache
+        server.requests = 0
+        config = {**get_config(), "watch_urls": [url, url], "notify_channels": [], "http_cache_mode": "off"}
+        check_all(config, JobStore(str(tmp_path / "state.db")))
+        assert server.requests == 1
@@ -0,0 +1,22 @@
+"""Tests for the end-to-end load harness and its local stand-ins."""
+
+from benchmarks.load import percentile, run_load
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_run_load_notifies_every_job_once(tmp_path):
+    """Test a short churn run end to end against the HTTP and SMTP stand-ins."""
+    report = run_load(targets=2, hours=3, rows=60, churn_rate=0.1, workdir=tmp_path)
+
+    assert report["cycles"] == 6
+    assert report["failed_cycles"] == 0
+    assert report["emails_sent"] > 0
+    assert report["duplicates"] == 0
+    assert report["missed"] == 0
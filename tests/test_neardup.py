@@ -0,0 +1,120 @@
+"""Tests for near-duplicate (re-post) detection."""
+
+import json
+import sqlite3
+from dataclasses import replace
+from datetime import date, timedelta
+
+from benchmarks.pages import Listing, render_page
+from watcher import runner
+from watcher.fetch import FetchResult
+from watcher.models import Job
+from watcher.neardup import LshIndex, find_reposts, signature, similarity
+from watcher.runner import check_once, get_config
+from watcher.store import JobStore
+
+
+def _job(title: str, job_date: str = "10.10.2030", time_range: str = "08:00 - 16:00") -> Job:
+    job = Job(
+        title=title,
+        city="Brno",
+        date=job_date,
+        day_of_week="Čt",
+        time_range=time_range,
+        duration_hours="8",
+        wage_czk_per_h="200 Kč/h",
+        raw_text=f"» {title} Brno {job_date} Čt {time_range} (8h) 200 Kč/h",
+    )
+    job.job_key = job.compute_key()
+    return job
+
+
+def test_signatures_and_lsh_index():
+    """Test that a reworded row is similar and found through the index, an unrelated one is not."""
+    original = signature(_job("Pomocník ve skladu").raw_text)
+    reworded = signature(_job("Pomocník ve skladu (brigáda)").raw_text)
+    unrelated = signature(_job("Hostesa na veletrhu", "3.11.2030", "18:00 - 22:30").raw_text)
+
+    assert signature(_job("Pomocník ve skladu").raw_text) == original
+    assert similarity(original, reworded) >= 0.7 > similarity(original, unrelated)
+
+    index = LshIndex()
+    index.add("original", original)
+    index.add("unrelated", unrelated)
+    assert "original" in index.candidates(reworded)
+
+
+def test_find_reposts_requires_same_shift(tmp_path):
+    """Test that only a similar job on the same date and time counts as a re-post."""
+    store = JobStore(str(tmp_path / "state.db"))
+    original = _job("Pomocník ve skladu")
+    store.upsert_jobs([original])
+
+    repost = _job("Pomocník ve skladu (brigáda)")
+    next_day = _job("Pomocník ve skladu", "11.10.2030")
+    other = _job("Hostesa na veletrhu")
+    store.upsert_jobs([original, repost, next_day, other])
+
+    assert find_reposts(store, [repost, next_day, other]) == {repost.job_key: original.job_key}
+    with sqlite3.connect(store.db_path) as conn:
+        rows = dict(conn.execute("SELECT job_key, duplicate_of FROM jobs").fetchall())
+        assert conn.execute("SELECT COUNT(*) FROM jobs WHERE minhash IS NULL").fetchone()[0] == 0
+    assert rows[repost.job_key] == original.job_key
+    assert rows[next_day.job_key] is None
+
+
+def test_suppress_mode_does_not_notify_reposts(tmp_path, monkeypatch):
+    """Test that with NEAR_DUP_MODE=suppress a re-post is never sent but other new jobs are."""
+    store = JobStore(str(tmp_path / "state.db"))
+    path = tmp_path / "changes.jsonl"
+    monkeypatch.setenv("NEAR_DUP_MODE", "suppress")
+    config = {**get_config(), "watch_url": "http://example.invalid/mista",
+              "notify_channels": ["file"], "notify_file": str(path)}
+    day = date.today() + timedelta(days=7 - (date.today().weekday() + 2) % 7)  # next Saturday (only weekends are kept)
+    original = Listing(1, "Pomocník ve skladu", "Brno", day, 1, 200)
+    pages = iter([
+        render_page([original]),
+        render_page([replace(original, listing_id=2, title="Pomocník ve skladu (brigáda)"),
+                     Listing(3, "Inventura", "Brno", day, 1, 200)]),
+    ])
+    monkeypatch.setattr(runner, "fetch_page", lambda *args, **kwargs: FetchResult(status_code=200, text=next(pages)))
+
+    check_once(config, store)
+    check_once(config, store)
+
+    sent = [json.loads(line)["job"]["title"] for line in path.read_text(encoding="utf-8").splitlines()]
+    assert sent == ["Pomocník ve skladu", "Inventura"]
+    reposts = [job for job in store.get_all_jobs().values() if "brigáda" in job.title]
+    assert len(reposts) == 1 and reposts[0].job_key in store.notified_keys("new", "file")
+
+
+def test_group_mode_shows_reposts(tmp_path, monkeypatch):
+    """Test that with NEAR_DUP_MODE=group a re-post is sent marked with the job it repeats."""
+    from watcher import notify
+    from watcher.notify import render_body, render_html
+
+    store = JobStore(str(tmp_path / "state.db"))
+    path = tmp_path / "changes.jsonl"
+    monkeypatch.setenv("NEAR_DUP_MODE", "group")
+    config = {**get_config(), "watch_url": "http://example.invalid/mista",
+              "notify_channels": ["file"], "notify_file": str(path)}
+    day = date.today() + timedelta(days=7 - (date.today().weekday() + 2) % 7)  # next Saturday
+    original = Listing(1, "Pomocník ve skladu", "Brno", day, 1, 200)
+    repost = replace(original, listing_id=2, title="Pomocník ve skladu (brigáda)")
+    pages = iter([render_page([original]), render_page([repost])])
+    monkeypatch.setattr(runner, "fetch_page", lambda *args, **kwargs: FetchResult(status_code=200, text=next(pages)))
+    sent = []
+    dispatch = notify.dispatch
+    monkeypatch.setattr(notify, "dispatch", lambda pending, *args, **kwargs: (
+        sent.extend(pending.values()) or dispatch(pending, *args, **kwargs)
+    ))
+
+    check_once(config, store)
+    check_once(config, store)
+
+    [first, second] = [json.loads(line)["job"] for line in path.read_text(encoding="utf-8").splitlines()]
+    assert first["duplicate_of"] is None and second["duplicate_of"] == first["job_key"]
+    assert "Re-post of: Pomocník ve skladu (Brno, first seen" in render_body(sent[-1], "x")
+    assert "re-post of Pomocník ve skladu" in render_html(sent[-1], "x")
+    rows = {row["title"]: row["duplicate_of"] for row in store.query_jobs()}
+    assert rows == {"Pomocník ve skladu": None, "Pomocník ve skladu (brigáda)": first["job_key"]}
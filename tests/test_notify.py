@@ -0,0 +1,136 @@
+"""Tests for notification channels and concurrent dispatch."""
+
+import json
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.pages import generate_page
+from benchmarks.stubs import SMTPSink, WebhookSink
+from watcher import runner
+from watcher.diff import JobDiff
+from watcher.fetch import FetchResult
+from watcher.notify import FileNotifier, Notifier, WebhookNotifier, dispatch
+from watcher.parse import parse_html
+from watcher.runner import check_once, get_config
+from watcher.store import JobStore
+
+URL = "http://example.invalid/mista"
+
+
+def _diff(rows: int) -> JobDiff:
+    diff = JobDiff()
+    diff.new = parse_html(generate_page(rows, base_date=date.today() + timedelta(days=1)))
+    return diff
+
+
+def test_slow_webhook_does_not_delay_other_channels(tmp_path):
+    """Test that channels run concurrently and a timed-out one fails on its own."""
+    diff = _diff(10)
+    path = tmp_path / "changes.jsonl"
+    with WebhookSink(delay=2.0) as sink:
+        webhook, sink_file = WebhookNotifier(sink.url, timeout=0.3), FileNotifier(str(path))
+        start = time.monotonic()
+        results = dispatch({webhook: diff, sink_file: diff}, URL)
+        elapsed = time.monotonic() - start
+
+    assert results == {"webhook": False, "file": True}
+    assert elapsed < 1.0
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == len(diff.new) and {line["type"] for line in lines} == {"new"}
+
+
+class _SlowNotifier(Notifier):
+    name = "slow"
+
+    def __init__(self, timeout: float, delay: float):
+        super().__init__(timeout)
+        self.delay = delay
+
+    def send(self, diff, url) -> bool:
+        time.sleep(self.delay)
+        return True
+
+
+def test_slow_channel_is_not_counted_as_failed():
+    """Test that a send a bit slower than its timeout still counts, and a later one is reported when done."""
+    assert dispatch({_SlowNotifier(timeout=0.2, delay=0.3): JobDiff()}, URL) == {"slow": True}
+
+    late = []
+    finished = threading.Event()
+    results = dispatch(
+        {_SlowNotifier(timeout=0.05, delay=0.4): JobDiff()},
+        URL,
+        on_late=lambda name, delivered: (late.append((name, delivered)), finished.set()),
+    )
+    assert results == {"slow": None} and late == []
+    assert finished.wait(2) and late == [("slow", True)]
+
+
+def test_channels_track_delivery_independently(tmp_path, monkeypatch):
+    """Test that a failing webhook is retried alone while email is not sent twice."""
+    store = JobStore(str(tmp_path / "state.db"))
+    page = FetchResult(status_code=200, text=generate_page(20, base_date=date.today() + timedelta(days=1)))
+    monkeypatch.setattr(runner, "fetch_page", lambda *args, **kwargs: page)
+
+    with SMTPSink() as smtp, WebhookSink(status=500) as hook:
+        for name, value in {
+            "SMTP_HOST": smtp.host, "SMTP_PORT": str(smtp.port), "SMTP_USER": "u", "SMTP_PASS": "p",
+            "SMTP_STARTTLS": "false", "EMAIL_FROM": "watcher@watcher.test", "EMAIL_TO": "me@watcher.test",
+        }.items():
+            monkeypatch.setenv(name, value)
+        config = {
+            **get_config(),
+            "watch_url": URL,
+            "notify_channels": ["email", "webhook", "file"],
+            "webhook_url": hook.url,
+            "notify_file": str(tmp_path / "changes.jsonl"),
+        }
+
+        assert check_once(config, store) is True
+        assert len(smtp.messages) == 1 and hook.payloads == []
+        assert store.get_fetch_state(URL) is None  # webhook still pending
+
+        hook.status = 200
+        assert check_once(config, store) is True
+        assert len(smtp.messages) == 1
+        assert len(hook.payloads) == 1 and len(hook.payloads[0]["new"]) > 0
+
+        assert check_once(config, store) is False
+    keys = {job.job_key for job in parse_html(page.text)}
+    assert all(store.notified_keys("new", channel) == keys for channel in ("email", "webhook", "file"))
+
+
+def test_email_has_plain_and_html_parts_rendered_once_per_job(tmp_path):
+    """Test the multipart email and that repeated jobs reuse their rendered blocks."""
+    from watcher.notify import EmailNotifier, _render_fragment, render_body, render_html
+
+    diff = _diff(5)
+    diff.new[0].title = "Pomocník <sklad> & expedice"
+    _render_fragment.cache_clear()
+    with SMTPSink() as smtp:
+        notifier = EmailNotifier(smtp.host, smtp.port, "u", "p", "w@watcher.test", ["a@x.test", "b@x.test"], False)
+        assert notifier.send(diff, URL)
+
+    (msg,) = smtp.messages
+    parts = {part.get_content_type(): part.get_payload(decode=True).decode("utf-8") for part in msg.get_payload()}
+    assert "Title: Pomocník <sklad> & expedice" in parts["text/plain"]
+    assert "<b>Pomocník &lt;sklad&gt; &amp; expedice</b>" in parts["text/html"]
+    assert _render_fragment.cache_info().misses == 2 * len(diff.new)
+
+    render_body(diff, URL)
+    render_html(diff, URL)
+    assert _render_fragment.cache_info().misses == 2 * len(diff.new)
+    assert render_body(JobDiff(), URL) == render_html(JobDiff(), URL) == ""
+
+
+def test_channel_names_are_checked_at_startup(monkeypatch):
+    """Test that NOTIFY_CHANNELS is de-duplicated and an unknown channel fails before any check."""
+    monkeypatch.setenv("NOTIFY_CHANNELS", "email, webhook,email")
+    assert get_config()["notify_channels"] == ["email", "webhook"]
+
+    monkeypatch.setenv("NOTIFY_CHANNELS", "email,webhok")
+    with pytest.raises(ValueError, match="webhok"):
+        get_config()
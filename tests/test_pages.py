@@ -0,0 +1,30 @@
+"""Tests for the synthetic benchmark page generator."""
+
+from benchmarks.pages import churn, generate_listings, generate_page, render_page
+from watcher.parse import parse_html
+
+
+def test_generate_page_is_deterministic():
+    """Test that the same seed always yields the same page."""
+    assert generate_page(50, seed=7) == generate_page(50, seed=7)
+    assert generate_page(50, seed=7) != generate_page(50, seed=8)
+
+
+def test_generated_page_parses_weekend_rows():
+    """Test that the parser picks up exactly the generated weekend rows."""
+    listings = generate_listings(200, seed=1)
+    jobs = parse_html(render_page(listings))
+
+    weekend = [listing for listing in listings if listing.is_weekend]
+    assert len(jobs) == len(weekend)
+    assert {job.city for job in jobs} <= {listing.city for listing in weekend}
+
+
+def test_churn_adds_removes_and_changes():
+    """Test that churn applies the requested number of edits."""
+    listings = generate_listings(100, seed=2)
+    churned = churn(listings, seed=3, added=5, removed=10, changed=0)
+
+    assert len(churned) == 95
+    assert len(listings) == 100  # input untouched
+    assert max(listing.listing_id for listing in churned) == 105
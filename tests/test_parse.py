@@ -1,8 +1,10 @@
 """Tests for HTML parsing."""
 
 import os
+from datetime import date
 
-from watcher.parse import parse_html
+from benchmarks.pages import Listing, generate_page, render_row
+from watcher.parse import RowExtractor, iter_jobs, parse_html
 
 
 def test_parse_html_with_fixture():
@@ -40,3 +42,68 @@ def test_parse_html_no_section():
     jobs = parse_html(html)
     # Should not crash, may return empty list
     assert isinstance(jobs, list)
+
+
+def test_iter_jobs_matches_parse_html_and_stops_after_table():
+    """Test that streamed parsing yields the same jobs and stops reading after the job table."""
+    page = generate_page(500, base_date=date(2030, 1, 1))
+    page = page.replace("</footer>", "<p>Footer text</p>" * 20000 + "</footer>")
+    pulled = []
+
+    def chunks(size):
+        for i in range(0, len(page), size):
+            pulled.append(i)
+            yield page[i:i + size]
+
+    expected = [job.job_key for job in parse_html(page)]
+    assert expected
+    for size in (7, 1000, 65536):
+        pulled.clear()
+        assert [job.job_key for job in iter_jobs(chunks(size), stop_early=True)] == expected
+        assert pulled[-1] < page.index("</table>") + len("</table>")
+    assert [job.job_key for job in iter_jobs(chunks(1000))] == expected
+
+
+def _rows(first: int, count: int) -> str:
+    saturday = date(2030, 1, 5)
+    return "".join(render_row(Listing(i, f"Job {i}", "Praha", saturday, 1, 150)) for i in range(first, first + count))
+
+
+def _streamed(page: str, size: int, stop_early: bool = False):
+    return [job.job_key for job in iter_jobs((page[i:i + size] for i in range(0, len(page), size)), stop_early)]
+
+
+def test_iter_jobs_handles_nested_and_separate_tables():
+    """Test that nested tables do not cut job rows and that jobs in later tables are read."""
+    detail = "<table><tr><td>Detail</td></tr><tr><td>More</td></tr></table>"
+    rows = _rows(0, 6)
+    nested = f"<table>{rows[:rows.index('</td>')]}{detail}{rows[rows.index('</td>'):]}</table>"
+    cells = "".join(f"<tr><td><table>{_rows(first, 3)}</table></td></tr>" for first in (0, 3))
+    layout = f"<table>{cells}</table>"
+    separate = f"<table>{_rows(0, 3)}</table><p>Also this week</p><table>{_rows(3, 3)}</table>"
+
+    for body in (nested, layout, separate):
+        page = f"<html><body><section>{body}</section></body></html>"
+        expected = [job.job_key for job in parse_html(page)]
+        assert len(set(expected)) == 6
+        for size in (1, 5, 64, 100000):
+            assert _streamed(page, size) == expected
+    # Stopping early gives up the second of two separate tables, as documented
+    assert len(set(_streamed(separate, 64, stop_early=True))) == 3
+
+
+def test_row_extractor_drops_text_outside_tables():
+    """Test that a long table-less header is not kept (or rescanned) while the page streams in."""
+    header = "<html><head><title>Brigády</title></head><body>" + '<div class="news"><p>Novinky</p></div>' * 20000
+    page = f"{header}<section><table>{_rows(0, 5)}</table></section></body></html>"
+    for size in (7, 100):
+        extractor = RowExtractor()
+        jobs, longest = [], 0
+        for i in range(0, len(page), size):
+            jobs.extend(extractor.feed(page[i:i + size]))
+            if i < len(header):
+                longest = max(longest, len(extractor._buffer))
+        jobs.extend(extractor.close())
+        assert longest < 2 * size + 100
+        assert [job.job_key for job in jobs] == [job.job_key for job in parse_html(page)]
+        assert len(jobs) == 5
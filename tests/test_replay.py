@@ -0,0 +1,97 @@
+"""Tests for rebuilding state from archived snapshots."""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.pages import churn, generate_listings, render_page
+from watcher import replay as replay_module
+from watcher.parse import parse_html
+from watcher.replay import replay
+from watcher.snapshots import SnapshotStore
+from watcher.store import JobStore
+
+URL = "https://brigoska.cz/cs/mista"
+
+
+def _archive(root: str) -> list:
+    """Archive hourly captures with churn, repeats and a flip back to an old page."""
+    store = SnapshotStore(root, keyframe_interval=4)
+    versions = [generate_listings(30, seed=1)]
+    for i in range(5):
+        versions.append(churn(versions[-1], seed=i, added=2, removed=2, changed=1))
+    captures = versions + versions[-1:] + versions[1:2] + versions[-1:]
+    start = datetime(2026, 2, 1)
+    for hour, listings in enumerate(captures):
+        store.add(URL, render_page(listings), taken_at=start + timedelta(hours=hour))
+    store.add("https://example.com/other", render_page(generate_listings(5, seed=9, start_id=100)), taken_at=start)
+    store.close()
+    return captures
+
+
+def _rows(db_path: str) -> tuple:
+    with sqlite3.connect(db_path) as conn:
+        jobs = conn.execute("SELECT * FROM jobs ORDER BY job_key").fetchall()
+        ledger = conn.execute(
+            "SELECT job_key, change_type, notified_at FROM notifications ORDER BY job_key, change_type"
+        ).fetchall()
+    return jobs, ledger
+
+
+def test_replay_rebuilds_history(tmp_path, monkeypatch):
+    """Test that replay yields the same state in-process and in a worker pool."""
+    root = str(tmp_path / "snapshots")
+    captures = _archive(root)
+
+    # A one-page cache forces the flip back to be parsed again
+    monkeypatch.setattr(replay_module, "PARSED_CACHE_SIZE", 1)
+    totals = replay(root, str(tmp_path / "serial.db"), workers=1)
+    monkeypatch.undo()
+    replay(root, str(tmp_path / "parallel.db"), workers=2)
+
+    assert totals["targets"] == 2
+    assert totals["captures"] == len(captures) + 1
+    assert totals["pages"] == 6 + 1
+    assert _rows(str(tmp_path / "serial.db")) == _rows(str(tmp_path / "parallel.db"))
+
+    pages = [{job.job_key for job in parse_html(render_page(listings))} for listings in captures]
+    store = JobStore(str(tmp_path / "serial.db"))
+    jobs = store.get_all_jobs()
+    other = {job.job_key for job in parse_html(render_page(generate_listings(5, seed=9, start_id=100)))}
+    assert set(jobs) == set().union(*pages) | other
+    assert all(store.was_notified(key, "new") for key in jobs)
+    assert all(store.was_notified(key, "removed") for key in set(jobs) - pages[-1] - other)
+    assert not any(store.was_notified(key, "removed") for key in pages[0] & pages[-1])
+    assert sum(row["active"] for row in store.rollup_stats()) == len(pages[-1] | other)
+    assert sum(row["posted"] for row in store.rollup_stats()) == len(jobs)
+
+    # A job only on the first page was seen exactly once
+    dropped = jobs[next(iter(pages[0] - set().union(*pages[1:])))]
+    assert dropped.first_seen == dropped.last_seen == datetime(2026, 2, 1)
+
+
+def test_replay_refuses_existing_db(tmp_path):
+    """Test that replay never writes into an existing state DB."""
+    root = str(tmp_path / "snapshots")
+    _archive(root)
+    db_path = tmp_path / "state.db"
+    JobStore(str(db_path))
+
+    with pytest.raises(FileExistsError):
+        replay(root, str(db_path))
+
+
+def test_replays_of_two_archives_in_one_process(tmp_path):
+    """Test that a second replay of another archive with the same URL does not reuse the first one's index."""
+    first, second = str(tmp_path / "first"), str(tmp_path / "second")
+    _archive(first)
+    store = SnapshotStore(second)
+    store.add(URL, render_page(generate_listings(10, seed=5)), taken_at=datetime(2026, 3, 1))
+    store.close()
+
+    replay(first, str(tmp_path / "first.db"), workers=1)
+    totals = replay(second, str(tmp_path / "second.db"), workers=1)
+    assert totals["captures"] == 1
+    expected = {job.job_key for job in parse_html(render_page(generate_listings(10, seed=5)))}
+    assert set(JobStore(str(tmp_path / "second.db")).get_all_jobs()) == expected
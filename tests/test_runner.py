@@ -0,0 +1,60 @@
+"""Tests for the check cycle across several worker processes."""
+
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+from benchmarks.pages import generate_page
+from benchmarks.stubs import PageServer, SMTPSink
+from watcher.parse import parse_html
+from watcher.store import JobStore
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_workers_sharing_a_db_notify_each_job_once(tmp_path):
+    """Test that concurrent processes split the targets and never send a job twice."""
+    db_path = tmp_path / "state.db"
+    tomorrow = date.today() + timedelta(days=1)
+    expected = set()
+    with PageServer() as server, SMTPSink() as sink:
+        urls = []
+        for i in range(4):
+            html = generate_page(40, seed=i, base_date=tomorrow)
+            server.set_page(f"/targets/{i}", html)
+            urls.append(f"{server.base_url}/targets/{i}")
+            expected.update(job.raw_text for job in parse_html(html))
+
+        env = {
+            **os.environ,
+            "WATCH_URL": ",".join(urls),
+            "STATE_DB_PATH": str(db_path),
+            "SMTP_HOST": sink.host,
+            "SMTP_PORT": str(sink.port),
+            "SMTP_USER": "worker",
+            "SMTP_PASS": "worker",
+            "SMTP_STARTTLS": "false",
+            "EMAIL_FROM": "watcher@watcher.test",
+            "EMAIL_TO": "me@watcher.test",
+        }
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-m", "watcher", "--once"],
+                cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+            )
+            for _ in range(4)
+        ]
+        outputs = [worker.communicate(timeout=120)[0] for worker in workers]
+
+    assert all(worker.returncode == 0 for worker in workers), outputs
+    notified = Counter()
+    for msg in sink.messages:
+        plain = next(part for part in msg.walk() if part.get_content_type() == "text/plain")
+        notified.update(re.findall(r"^Raw: (.*)$", plain.get_payload(decode=True).decode("utf-8"), re.MULTILINE))
+    assert set(notified) == expected
+    assert max(notified.values()) == 1
+    assert len(JobStore(str(db_path)).notified_keys("new")) == len(expected)
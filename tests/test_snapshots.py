@@ -0,0 +1,57 @@
+"""Tests for the raw page snapshot archive."""
+
+import os
+from datetime import datetime, timedelta
+
+from benchmarks.pages import churn, generate_listings, render_page
+from watcher.snapshots import SnapshotStore, apply_delta, make_delta, target_id
+
+URL = "https://brigoska.cz/cs/mista"
+
+
+def test_delta_roundtrip():
+    """Test that a delta rebuilds the new page exactly."""
+    base = "a\nb\nc\nd\n"
+    text = "a\nB\nc\nd\ne"
+    assert apply_delta(base, make_delta(base, text)) == text
+
+
+def test_identical_pages_are_stored_once(tmp_path):
+    """Test that repeated captures of the same page only add index entries."""
+    store = SnapshotStore(str(tmp_path))
+    html = render_page(generate_listings(50))
+
+    first = store.add(URL, html)
+    pack_size = os.path.getsize(tmp_path / target_id(URL) / "pack")
+    second = store.add(URL, html)
+
+    assert first.content_hash == second.content_hash
+    assert os.path.getsize(tmp_path / target_id(URL) / "pack") == pack_size
+    assert len(store.history(URL)) == 2
+    assert store.targets() == {target_id(URL): URL}
+
+
+def test_month_of_hourly_snapshots(tmp_path):
+    """Test that a month of hourly captures stays small and reads back exactly."""
+    store = SnapshotStore(str(tmp_path), keyframe_interval=8)
+    listings = generate_listings(200, seed=4)
+    pages = {}
+    start = datetime(2026, 1, 1)
+    for hour in range(24 * 30):
+        if hour % 4 == 0:
+            listings = churn(listings, seed=hour, added=2, removed=2, changed=1)
+        entry = store.add(URL, render_page(listings), taken_at=start + timedelta(hours=hour))
+        pages[entry.content_hash] = render_page(listings)
+        assert entry.depth < 8
+
+    directory = tmp_path / target_id(URL)
+    total = sum(os.path.getsize(directory / name) for name in os.listdir(directory))
+    assert total < 2 * 1024 * 1024
+
+    reader = SnapshotStore(str(tmp_path))
+    history = list(reader.iter_pages(URL))
+    assert len(history) == 24 * 30
+    for entry, html in history:
+        assert html == pages[entry.content_hash]
+    assert reader.read(URL, history[5][0].content_hash) == pages[history[5][0].content_hash]
+    reader.close()
@@ -0,0 +1,118 @@
+"""Tests for the fast startup path and short-circuited check cycles."""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import date, timedelta
+
+from benchmarks.pages import generate_page
+from benchmarks.stubs import PageServer
+from watcher import runner
+from watcher.fetch import FetchResult
+from watcher.runner import check_once, get_config
+from watcher.store import JobStore
+
+HEAVY_MODULES = ["httpx", "selectolax", "typer", "click", "rich", "dotenv", "smtplib", "email.mime"]
+
+# Generous enough for a cold CI runner, yet well below importing typer + httpx
+IMPORT_BUDGET_S = 0.15
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_python(code: str, env=None) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **(env or {})},
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _loaded_heavy_modules() -> str:
+    return (
+        "[m for m in sys.modules if any(m == h or m.startswith(h + '.') for h in %r)]" % HEAVY_MODULES
+    )
+
+
+def test_runner_import_is_light():
+    """Test that importing the cycle module loads no heavy dependency and stays in budget."""
+    data = _run_python(
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import watcher.runner\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'elapsed': elapsed, 'heavy': {_loaded_heavy_modules()}}}))\n"
+    )
+    assert data["heavy"] == []
+    assert data["elapsed"] < IMPORT_BUDGET_S
+
+
+def test_not_modified_run_skips_parse_and_smtp(tmp_path):
+    """Test that a 304 run never imports the parser or the mail stack."""
+    db_path = str(tmp_path / "state.db")
+    with PageServer() as server:
+        url = f"{server.base_url}/mista"
+        server.set_page("/mista", generate_page(0))
+        check_once({**get_config(), "watch_url": url}, JobStore(db_path))  # stores the ETag
+
+        data = _run_python(
+            "import json, sys\n"
+            "from watcher.runner import run_once\n"
+            "run_once()\n"
+            f"print(json.dumps({{'heavy': {_loaded_heavy_modules()}}}))\n",
+            env={"WATCH_URL": url, "STATE_DB_PATH": db_path},
+        )
+
+    assert server.not_modified == 1
+    assert [m for m in data["heavy"] if not m.startswith("httpx")] == []
+
+
+def test_streamed_check_parses_while_downloading(tmp_path, monkeypatch):
+    """Test that STREAM_PARSE stores the same jobs as a full parse and keeps conditional fetches."""
+    from watcher.parse import parse_html
+
+    monkeypatch.setenv("STREAM_PARSE", "true")
+    monkeypatch.setenv("STREAM_STOP_EARLY", "true")
+    store = JobStore(str(tmp_path / "state.db"))
+    page = generate_page(300, base_date=date.today() + timedelta(days=1))
+    page = page.replace("</footer>", "<p>Footer text</p>" * 20000 + "</footer>")
+    with PageServer() as server:
+        server.set_page("/mista", page)
+        config = {**get_config(), "watch_url": f"{server.base_url}/mista", "notify_channels": []}
+        check_once(config, store)
+        assert set(store.get_all_jobs()) == {job.job_key for job in parse_html(page)}
+
+        assert check_once(config, store) is False
+    assert server.not_modified == 1
+
+
+def test_unchanged_content_short_circuits(tmp_path, monkeypatch, capsys):
+    """Test that an unchanged body is not parsed again when the server sends no validators."""
+    store = JobStore(str(tmp_path / "state.db"))
+    page = FetchResult(status_code=200, text=generate_page(0))
+    monkeypatch.setattr(runner, "fetch_page", lambda *args, **kwargs: page)
+    config = {**get_config(), "watch_url": "http://example.invalid/mista"}
+
+    check_once(config, store)
+    capsys.readouterr()
+
+    assert check_once(config, store) is False
+    assert "unchanged" in capsys.readouterr().out
+
+
+def test_failed_send_forces_full_check(tmp_path, monkeypatch):
+    """Test that pending notifications are retried even if the page is unchanged."""
+    store = JobStore(str(tmp_path / "state.db"))
+    page = FetchResult(status_code=200, text=generate_page(30, base_date=date.today() + timedelta(days=1)))
+    monkeypatch.setattr(runner, "fetch_page", lambda *args, **kwargs: page)
+    monkeypatch.delenv("SMTP_HOST", raising=False)
+    config = {**get_config(), "watch_url": "http://example.invalid/mista"}
+
+    assert check_once(config, store) is True  # send fails: SMTP not configured
+    assert store.get_fetch_state(config["watch_url"]) is None
+    assert check_once(config, store) is True  # parsed again, jobs still pending
@@ -0,0 +1,75 @@
+"""Tests for live state snapshots."""
+
+import gzip
+import sqlite3
+from datetime import date
+
+import pytest
+
+from watcher.models import Job
+from watcher.state import export_state, import_state
+from watcher.store import JobStore
+
+
+def _job(title: str, job_date: str) -> Job:
+    job = Job(
+        title=title,
+        city="Praha",
+        date=job_date,
+        day_of_week="So",
+        time_range="06:00 - 14:00",
+        duration_hours="8",
+        wage_czk_per_h="180 Kč/h",
+        raw_text=f"» {title} Praha {job_date} So 06:00 - 14:00 (8h) 180 Kč/h",
+    )
+    job.job_key = job.compute_key()
+    return job
+
+
+def test_export_import_roundtrip(tmp_path):
+    """Test that a snapshot keeps live jobs, the ledger and validators but drops expired jobs."""
+    source = JobStore(str(tmp_path / "source.db"))
+    live, expired = _job("Skladník", "7.2.2026"), _job("Inventura", "3.1.2026")
+    source.upsert_jobs([live, expired])
+    source.mark_notified(live.job_key, "new")
+    source.mark_notified(live.job_key, "new")  # duplicate ledger row
+    source.mark_notified(expired.job_key, "new")
+    source.save_fetch_state("https://example.cz/mista", '"abc"', None, "hash")
+
+    snapshot = tmp_path / "state.snapshot.json.gz"
+    counts = export_state(source, snapshot, cutoff=date(2026, 2, 1))
+    assert counts == {
+        "jobs": 1, "notifications": 1, "fetch_state": 1, "blocks": 0, "block_notifications": 0,
+        "rollup_daily": 2, "rollup_wages": 2,
+    }
+
+    target = JobStore(str(tmp_path / "target.db"))
+    target.upsert_jobs([expired])  # replaced by the import
+    assert import_state(target, snapshot) == counts
+
+    assert list(target.get_all_jobs()) == [live.job_key]
+    assert target.get_all_jobs()[live.job_key].title == "Skladník"
+    assert target.was_notified(live.job_key, "new")
+    assert target.get_fetch_state("https://example.cz/mista")["etag"] == '"abc"'
+
+
+def test_import_rejects_other_files(tmp_path):
+    """Test that a file that is not a snapshot is refused."""
+    path = tmp_path / "other.json.gz"
+    with gzip.open(path, "wb") as f:
+        f.write(b'{"format": "something-else"}')
+
+    with pytest.raises(ValueError):
+        import_state(JobStore(str(tmp_path / "state.db")), path)
+
+
+def test_snapshot_is_smaller_than_db(tmp_path):
+    """Test that history is left behind in the snapshot."""
+    store = JobStore(str(tmp_path / "state.db"))
+    store.upsert_jobs([_job(f"Job {i}", "3.1.2026") for i in range(200)])
+    with sqlite3.connect(store.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 200
+
+    snapshot = tmp_path / "state.snapshot.json.gz"
+    export_state(store, snapshot, cutoff=date(2026, 2, 1))
+    assert snapshot.stat().st_size < (tmp_path / "state.db").stat().st_size / 10
@@ -0,0 +1,224 @@
+"""Tests for SQLite storage, retention and compaction."""
+
+import sqlite3
+from datetime import date
+
+from watcher.models import Job
+from watcher.store import JobStore
+
+
+def _job(title: str, job_date: str) -> Job:
+    job = Job(
+        title=title,
+        city="Brno",
+        date=job_date,
+        day_of_week="Ne",
+        time_range="08:00 - 16:00",
+        duration_hours="8",
+        wage_czk_per_h="200 Kč/h",
+        raw_text=f"» {title} Brno {job_date} Ne 08:00 - 16:00 (8h) 200 Kč/h",
+    )
+    job.job_key = job.compute_key()
+    return job
+
+
+def _count(db_path: str, table: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_archive_expired_into_archive_tables(tmp_path):
+    """Test that expired jobs and their notifications move to the archive tables."""
+    store = JobStore(str(tmp_path / "state.db"))
+    live, expired = _job("Live", "8.2.2026"), _job("Old", "1.2.2026")
+    store.upsert_jobs([live, expired, _job("Undated", "")])
+    store.mark_notified(live.job_key, "new")
+    store.mark_notified(expired.job_key, "new")
+    store.mark_notified(expired.job_key, "removed")
+
+    archived = store.archive_expired(date(2026, 2, 2))
+
+    assert archived == {"jobs": 1, "notifications": 2}
+    assert expired.job_key not in store.get_all_jobs()
+    assert len(store.get_all_jobs()) == 2
+    assert store.was_notified(live.job_key, "new")
+    assert _count(store.db_path, "jobs_archive") == 1
+    assert _count(store.db_path, "notifications_archive") == 2
+
+    # Running again is a no-op
+    assert store.archive_expired(date(2026, 2, 2)) == {"jobs": 0, "notifications": 0}
+
+
+def test_archive_expired_into_separate_file(tmp_path):
+    """Test archiving into a separate archive DB file."""
+    store = JobStore(str(tmp_path / "state.db"))
+    store.upsert_jobs([_job(f"Old {i}", "1.1.2026") for i in range(5)])
+    archive_path = str(tmp_path / "archive.db")
+
+    assert store.archive_expired(date(2026, 2, 1), archive_path)["jobs"] == 5
+    assert store.get_all_jobs() == {}
+    assert _count(archive_path, "jobs_archive") == 5
+
+
+def _freelist(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def test_compact_releases_pages_incrementally(tmp_path):
+    """Test that compaction frees at most the requested number of pages per call."""
+    store = JobStore(str(tmp_path / "state.db"))
+    store.upsert_jobs([_job(f"Old {i} " + "x" * 2000, "1.1.2026") for i in range(200)])
+    store.archive_expired(date(2026, 2, 1), str(tmp_path / "archive.db"))
+    free_pages = _freelist(store.db_path)
+    assert free_pages > 10
+
+    assert store.compact(max_pages=10) == 10
+    assert store.compact(max_pages=free_pages) == free_pages - 10
+    assert _freelist(store.db_path) == 0
+
+
+def test_compact_converts_legacy_db(tmp_path):
+    """Test that a DB created without auto_vacuum is switched to incremental mode."""
+    db_path = str(tmp_path / "state.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE legacy (value TEXT)")  # auto_vacuum is fixed once tables exist
+    store = JobStore(db_path)
+
+    store.compact()
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def _check_full_text(db_path: str) -> None:
+    """Raise if a full-text index no longer matches its jobs table."""
+    with sqlite3.connect(db_path) as conn:
+        for fts in ("jobs_fts", "jobs_archive_fts"):
+            conn.execute(f"INSERT INTO {fts}({fts}, rank) VALUES ('integrity-check', 1)")
+
+
+def test_query_jobs_filters_typed_columns(tmp_path):
+    """Test date, city, wage and text filters across live and archived jobs."""
+    store = JobStore(str(tmp_path / "state.db"))
+    store.upsert_jobs([
+        _job("Skladník", "10.9.2026"),
+        _job("Úklid kanceláří", "20.9.2026"),
+        _job("Skladník noční", "3.10.2026"),
+    ])
+    store.archive_expired(date(2026, 9, 15))
+    reworded = _job("Skladník noční", "3.10.2026")
+    reworded.raw_text += " nástup ihned"
+    store.upsert_jobs([reworded])
+    _check_full_text(store.db_path)
+
+    september = store.query_jobs(city="Brno", since=date(2026, 9, 1), until=date(2026, 9, 30), min_wage=200)
+    assert [(row["title"], row["archived"]) for row in september] == [("Úklid kanceláří", 0), ("Skladník", 1)]
+    assert september[0]["wage_czk"] == 200 and september[0]["hours"] == 8.0
+
+    # Full-text search ignores case and diacritics
+    assert {row["title"] for row in store.query_jobs(text="skladnik")} == {"Skladník", "Skladník noční"}
+    assert [row["title"] for row in store.query_jobs(text="skladnik", include_archive=False)] == ["Skladník noční"]
+    assert store.query_jobs(min_wage=201) == []
+    assert [row["title"] for row in store.query_jobs(text="nastup")] == ["Skladník noční"]
+
+
+def test_typed_columns_backfilled_on_legacy_db(tmp_path):
+    """Test that a DB from before the typed columns is migrated and searchable."""
+    db_path = str(tmp_path / "state.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE jobs (
+                job_key TEXT PRIMARY KEY, title TEXT NOT NULL, city TEXT NOT NULL, date TEXT,
+                day_of_week TEXT, time_range TEXT, duration_hours TEXT, wage_czk_per_h TEXT,
+                raw_text TEXT NOT NULL, first_seen TIMESTAMP NOT NULL, last_seen TIMESTAMP NOT NULL
+            )
+        """)
+        conn.execute(
+            "INSERT INTO jobs VALUES ('k1', 'Inventura', 'Brno', '26.1.2026', 'Po', '06:00 - 10:30', "
+            "'4.5', '180 Kč/h', '» Inventura Brno 26.1.2026 Po 06:00 - 10:30 (4.5h) 180 Kč/h', 'x', 'x')"
+        )
+    store = JobStore(db_path)
+
+    [row] = store.query_jobs(text="inventura")
+    assert (row["date_iso"], row["wage_czk"], row["hours"]) == ("2026-01-26", 180, 4.5)
+
+    with sqlite3.connect(db_path) as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM jobs WHERE city = 'Brno' AND date_iso >= '2026-01-01'"
+        ).fetchall()
+    assert "idx_jobs_city_date" in str(plan)
+
+
+def _priced(title: str, job_date: str, wage: int, hours: str = "8") -> Job:
+    job = _job(title, job_date)
+    job.wage_czk_per_h = f"{wage} Kč/h"
+    job.duration_hours = hours
+    job.raw_text = f"» {title} Brno {job_date} ({hours}h) {wage} Kč/h"
+    job.job_key = job.compute_key()
+    return job
+
+
+def _rollups(db_path: str) -> tuple:
+    with sqlite3.connect(db_path) as conn:
+        return (
+            conn.execute("SELECT * FROM rollup_daily ORDER BY day, city").fetchall(),
+            conn.execute("SELECT * FROM rollup_wages ORDER BY day, city, wage_czk").fetchall(),
+        )
+
+
+def test_rollups_track_inserts_and_disappearance(tmp_path):
+    """Test that rollups follow new, vanished and returning jobs and match a full rebuild."""
+    store = JobStore(str(tmp_path / "state.db"))
+    saturday = [_priced("A", "10.10.2026", 150), _priced("B", "10.10.2026", 200, "4.5")]
+    monday = [_priced("C", "12.10.2026", 180), _priced("D", "12.10.2026", 220), _priced("E", "12.10.2026", 240)]
+    store.upsert_jobs(saturday + monday)
+    store.upsert_jobs(saturday + monday)  # seen again: nothing new to count
+
+    assert store.mark_inactive([monday[0].job_key, monday[0].job_key]) == 1
+    assert store.mark_inactive([monday[0].job_key]) == 0
+    [row] = store.rollup_stats(city="Brno")
+    assert (row["posted"], row["active"]) == (5, 4)
+    assert row["median_wage"] == 200 and row["mean_wage"] == 198
+    assert (row["hours"], row["weekend_hours"]) == (36.5, 12.5)
+
+    by_day = store.rollup_stats(since=date(2026, 10, 11), by="day")
+    assert [(r["day"], r["posted"], r["active"], r["median_wage"]) for r in by_day] == [("2026-10-12", 3, 2, 220)]
+
+    store.upsert_jobs([monday[0]])  # listed again
+    store.archive_expired(date(2026, 10, 11))  # Saturday is archived: still posted, no longer listed
+    assert [(r["posted"], r["active"]) for r in store.rollup_stats()] == [(5, 3)]
+
+    incremental = _rollups(store.db_path)
+    with sqlite3.connect(store.db_path) as conn:
+        store._rebuild_rollups(conn)
+    assert _rollups(store.db_path) == incremental
+
+
+def test_leases_and_notification_claims(tmp_path):
+    """Test that leases and notification claims go to one owner at a time."""
+    store = JobStore(str(tmp_path / "state.db"))
+    assert store.acquire_lease("target:a", "w1", 60)
+    assert not store.acquire_lease("target:a", "w2", 60)
+    assert store.acquire_lease("target:a", "w1", 60)  # renewal
+    store.release_lease("target:a", "w2")  # not the holder: no-op
+    assert not store.acquire_lease("target:a", "w2", 60)
+    store.release_lease("target:a", "w1")
+    assert store.acquire_lease("target:a", "w2", 60)
+    assert store.acquire_lease("target:b", "w1", -1)
+    assert store.acquire_lease("target:b", "w2", 60)  # expired lease is taken over
+
+    keys = ["k1", "k2", "k3"]
+    store.mark_notified("k3", "new")
+    assert store.claim_notifications(keys, "new", "email", "w1", 60) == {"k1", "k2"}
+    assert store.claim_notifications(keys, "new", "email", "w2", 60) == set()
+    assert store.claim_notifications(keys, "new", "webhook", "w2", 60) == {"k1", "k2", "k3"}
+
+    store.release_claims(["k2"], "new", "email", "w1")
+    store.complete_claims(["k1"], "new", "email", "w1")
+    assert store.claim_notifications(keys, "new", "email", "w2", 60) == {"k2"}
+    assert store.notified_keys("new") == {"k1", "k3"}
+
+    # A claim older than the timeout is taken over (its worker died mid-send)
+    assert store.claim_notifications(["k2"], "new", "email", "w3", 0) == {"k2"}
+    store.mark_notified("k1", "new")
+    assert _count(store.db_path, "notifications") == 2
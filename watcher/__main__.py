@@ -1,6 +1,15 @@
 """Entry point for running watcher as a module."""
 
-from watcher.cli import app
+import sys
 
 if __name__ == "__main__":
-    app()
+    if sys.argv[1:] == ["--once"]:
+        # Fast path for cron runs: a plain --once needs no argument parsing,
+        # so skip importing typer (and rich) altogether.
+        from watcher.runner import run_once
+
+        run_once()
+    else:
+        from watcher.cli import app
+
+        app()
@@ -0,0 +1,226 @@
+"""
+Read-only JSON API over the current jobs, served from memory.
+
+``watcher serve`` runs the usual check loop and refreshes a JobCache after
+each check, which is the only time SQLite is read. Requests are answered
+from the cache:
+
+    GET /jobs                      current listings, with ETag / 304
+    GET /changes?since=N&wait=S    change events after cursor N, waiting up
+        [&epoch=E]                 to S seconds for one to arrive
+
+Cursors count from 0 again whenever the server restarts, so each JobCache
+has a random epoch, returned with every /changes answer. A cursor from
+another epoch, or one ahead of the log, is reported as truncated at once.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import secrets
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from watcher.diff import compute_diff
+from watcher.models import Job, job_to_dict
+from watcher.store import JobStore
+
+# Change events kept for clients that fall behind
+MAX_EVENTS = 1000
+
+# Longest a /changes request may wait for an event
+MAX_WAIT_SECONDS = 60.0
+
+
+class JobCache:
+    """
+    Current jobs as pre-encoded JSON, plus a bounded log of change events.
+
+    Readers only take a lock long enough to grab immutable references, so any
+    number of requests can be answered while a refresh is being prepared.
+    """
+
+    def __init__(self, max_events: int = MAX_EVENTS):
+        self._jobs: Optional[Dict[str, Job]] = None
+        self._body = b"[]"
+        self._gzip_body = gzip.compress(self._body)
+        self._etag = self._make_etag(self._body)
+        self._events: deque = deque(maxlen=max_events)
+        self._cursor = 0
+        self.epoch = secrets.token_hex(8)
+        self._changed = threading.Condition()
+
+    @staticmethod
+    def _make_etag(body: bytes) -> str:
+        return f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+    @property
+    def cursor(self) -> int:
+        """Sequence number of the latest change event."""
+        return self._cursor
+
+    def current(self) -> Tuple[str, bytes, bytes]:
+        """Return (etag, JSON body, gzip-compressed body) of the current jobs."""
+        with self._changed:
+            return self._etag, self._body, self._gzip_body
+
+    def refresh(self, store: JobStore) -> int:
+        """
+        Reload current jobs from the store and record what changed.
+
+        The first refresh only loads the jobs; clients start from /jobs.
+
+        Args:
+            store: Store to read (one query)
+
+        Returns:
+            Number of change events recorded
+        """
+        jobs = store.get_all_jobs(active_only=True)
+        diff = compute_diff(jobs if self._jobs is None else self._jobs, jobs)
+        ordered = sorted(jobs.values(), key=lambda job: (job.date, job.city, job.title, job.job_key))
+        body = json.dumps([job_to_dict(job) for job in ordered], ensure_ascii=False).encode("utf-8")
+        gzip_body = gzip.compress(body, compresslevel=6)
+
+        now = time.time()
+        events = (
+            [("new", job) for job in diff.new]
+            + [("removed", job) for job in diff.removed]
+            + [("changed", new) for _, new in diff.changed]
+        )
+        with self._changed:
+            self._jobs = jobs
+            if body != self._body:
+                self._body, self._gzip_body, self._etag = body, gzip_body, self._make_etag(body)
+            for change_type, job in events:
+                self._cursor += 1
+                self._events.append(
+                    {"cursor": self._cursor, "type": change_type, "at": now, "job": job_to_dict(job)}
+                )
+            if events:
+                self._changed.notify_all()
+        return len(events)
+
+    def changes(self, since: int, wait: float = 0.0, epoch: Optional[str] = None) -> Dict[str, object]:
+        """
+        Return change events after a cursor, long-polling if there are none yet.
+
+        A cursor from another epoch, or ahead of the latest event, was handed
+        out before a restart: it is answered at once with every retained
+        event and ``truncated``, so the client reloads /jobs.
+
+        Args:
+            since: Cursor returned by a previous call (0 for everything retained)
+            wait: Seconds to wait for an event before returning an empty list
+            epoch: Epoch returned with ``since`` (None if the client has none)
+
+        Returns:
+            {"epoch": this cache's epoch, "cursor": latest cursor, "events":
+            [...], "truncated": True if events after ``since`` were already
+            dropped from the log or belong to another epoch}
+        """
+        deadline = time.monotonic() + min(max(wait, 0.0), MAX_WAIT_SECONDS)
+        with self._changed:
+            stale = since > self._cursor or (epoch is not None and epoch != self.epoch)
+            if stale:
+                since = 0
+            while not stale and self._cursor <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            events: List[dict] = [event for event in self._events if event["cursor"] > since]
+            oldest = self._events[0]["cursor"] if self._events else self._cursor + 1
+            return {
+                "epoch": self.epoch,
+                "cursor": self._cursor,
+                "events": events,
+                "truncated": stale or since + 1 < oldest,
+            }
+
+
+class ApiServer:
+    """Threaded HTTP server answering from a JobCache."""
+
+    def __init__(self, cache: JobCache, host: str = "127.0.0.1", port: int = 8080):
+        self.cache = cache
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        cache = self.cache
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/jobs":
+                    self._send_jobs()
+                elif url.path == "/changes":
+                    query = parse_qs(url.query)
+                    try:
+                        since = int(query.get("since", ["0"])[0])
+                        wait = float(query.get("wait", ["0"])[0])
+                        if not math.isfinite(wait):
+                            raise ValueError(wait)
+                    except ValueError:
+                        self.send_error(400, "since and wait must be finite numbers")
+                        return
+                    epoch = query.get("epoch", [None])[0]
+                    body = json.dumps(cache.changes(since, wait, epoch), ensure_ascii=False).encode("utf-8")
+                    self._send(200, body, {"Cache-Control": "no-store"})
+                else:
+                    self.send_error(404)
+
+            def _send_jobs(self):
+                etag, body, gzip_body = cache.current()
+                headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", headers)
+                    return
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip_body
+                    headers["Content-Encoding"] = "gzip"
+                self._send(200, body, headers)
+
+            def _send(self, status: int, body: bytes, headers: Dict[str, str]):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> None:
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "ApiServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -1,32 +1,21 @@
 """CLI interface for the watcher."""
 
-import os
 import sys
 import time
+from datetime import date
 from pathlib import Path
+from typing import Optional
 
 import typer
-from dotenv import load_dotenv
 
-from watcher.diff import compute_diff
-from watcher.fetch import fetch_url
-from watcher.notify import send_notification
-from watcher.parse import parse_html
+from watcher.runner import apply_retention, check_all, get_config, load_env, retention_cutoff, run_once
 from watcher.store import JobStore
 
-# Load .env from project root (not shared, in .gitignore)
-load_dotenv(Path(__file__).resolve().parent.parent / ".env")
-
 app = typer.Typer(invoke_without_command=True)
+state_app = typer.Typer(help="Export or import a compact snapshot of the live state.")
+app.add_typer(state_app, name="state")
 
-
-def get_config() -> dict:
-    """Load configuration from environment variables."""
-    return {
-        "watch_url": os.getenv("WATCH_URL", "https://brigoska.cz/cs/mista"),
-        "check_interval_minutes": int(os.getenv("CHECK_INTERVAL_MINUTES", "30")),
-        "state_db_path": os.getenv("STATE_DB_PATH", "./state.db"),
-    }
+DEFAULT_SNAPSHOT = Path("state.snapshot.json.gz")
 
 
 @app.callback()
@@ -35,104 +24,209 @@ def main(
     once: bool = typer.Option(False, "--once", help="Run once and exit"),
 ):
     """Run the watcher service."""
+    load_env()
     if ctx.invoked_subcommand is not None:
         return
+
+    if once:
+        run_once()
+        return
+
+    config = get_config()
+    store = JobStore(config["state_db_path"])
+    while True:
+        try:
+            check_all(config, store)
+            apply_retention(config, store)
+            print(f"Waiting {config['check_interval_minutes']} minutes until next check...")
+            time.sleep(config["check_interval_minutes"] * 60)
+        except KeyboardInterrupt:
+            print("\nStopping watcher...")
+            sys.exit(0)
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", help="Address to listen on"),
+    port: int = typer.Option(8080, help="Port to listen on"),
+):
+    """Run the watcher and serve current jobs and changes as JSON."""
+    from watcher.api import ApiServer, JobCache
+
+    config = get_config()
+    store = JobStore(config["state_db_path"])
+    cache = JobCache()
+    cache.refresh(store)
+    server = ApiServer(cache, host, port)
+    server.start()
+    print(f"Serving jobs on {server.base_url}/jobs and changes on {server.base_url}/changes")
+    try:
+        while True:
+            check_all(config, store)
+            apply_retention(config, store)
+            cache.refresh(store)
+            print(f"Waiting {config['check_interval_minutes']} minutes until next check...")
+            time.sleep(config["check_interval_minutes"] * 60)
+    except KeyboardInterrupt:
+        print("\nStopping watcher...")
+    finally:
+        server.stop()
+
+
+@state_app.command("export")
+def state_export(
+    path: Path = typer.Argument(DEFAULT_SNAPSHOT, help="Snapshot file to write"),
+):
+    """Write active jobs, the notification ledger and fetch validators to a snapshot."""
+    from watcher.state import export_state
+
+    config = get_config()
+    store = JobStore(config["state_db_path"])
+    counts = export_state(store, path, retention_cutoff(config))
+    print(
+        f"Exported {counts['jobs']} jobs, {counts['notifications']} notifications, "
+        f"{counts['fetch_state']} fetch validators to {path} ({path.stat().st_size} bytes)"
+    )
+
+
+@state_app.command("import")
+def state_import(
+    path: Path = typer.Argument(DEFAULT_SNAPSHOT, help="Snapshot file to read"),
+):
+    """Replace the state DB contents with a snapshot."""
+    from watcher.state import import_state
+
+    if not path.exists():
+        print(f"ERROR: Snapshot {path} not found")
+        raise typer.Exit(1)
+
+    store = JobStore(get_config()["state_db_path"])
+    try:
+        counts = import_state(store, path)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        raise typer.Exit(1)
+    print(
+        f"Imported {counts['jobs']} jobs, {counts['notifications']} notifications, "
+        f"{counts['fetch_state']} fetch validators from {path}"
+    )
+
+
+@app.command()
+def prune(
+    archive: str = typer.Option("", help="Archive DB file (default: ARCHIVE_DB_PATH, else archive tables)"),
+    vacuum_pages: int = typer.Option(0, help="Max pages to release (default: VACUUM_PAGES)"),
+):
+    """Archive expired jobs and compact the state DB."""
     config = get_config()
+    if archive:
+        config["archive_db_path"] = archive
+    if vacuum_pages:
+        config["vacuum_pages"] = vacuum_pages
     store = JobStore(config["state_db_path"])
+    apply_retention(config, store)
+
+
+@app.command()
+def query(
+    city: str = typer.Option("", help="Exact city name"),
+    since: str = typer.Option("", help="First listing date, YYYY-MM-DD"),
+    until: str = typer.Option("", help="Last listing date, YYYY-MM-DD"),
+    min_wage: Optional[int] = typer.Option(None, help="Lowest hourly wage (CZK)"),
+    max_wage: Optional[int] = typer.Option(None, help="Highest hourly wage (CZK)"),
+    text: str = typer.Option("", help="Words to search for in the listing text"),
+    archive: bool = typer.Option(True, help="Include archived (expired) jobs"),
+    limit: int = typer.Option(50, help="Maximum number of rows"),
+):
+    """Search current and archived jobs."""
+    try:
+        since_date = date.fromisoformat(since) if since else None
+        until_date = date.fromisoformat(until) if until else None
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        raise typer.Exit(1)
 
-    def check_once() -> bool:
-        """Perform a single check cycle. Returns True if changes were found."""
-        print(f"Fetching {config['watch_url']}...")
-        html = fetch_url(config["watch_url"])
-
-        if not html:
-            print("ERROR: Failed to fetch URL. Skipping update.")
-            return False
-
-        print("Parsing HTML...")
-        new_jobs_list = parse_html(html)
-        print(f"Found {len(new_jobs_list)} job listings")
-
-        # Convert to dict keyed by job_key
-        new_jobs = {}
-        for job in new_jobs_list:
-            if not job.job_key:
-                job.job_key = job.compute_key()
-            new_jobs[job.job_key] = job
-
-        # Get old jobs
-        old_jobs = store.get_all_jobs()
-
-        # Compute diff
-        diff = compute_diff(old_jobs, new_jobs)
-
-        # Update store with new jobs FIRST (before filtering notifications)
-        store.upsert_jobs(new_jobs_list)
-
-        # Notify about all currently visible jobs not yet successfully notified.
-        # This covers both genuinely new jobs and jobs that were stored earlier
-        # but whose notification was never sent (e.g. SMTP not configured on
-        # the first run). Using new_jobs_list instead of diff.new ensures that
-        # previously-seen-but-never-notified weekend jobs are not silently lost.
-        new_to_notify = [j for j in new_jobs_list if not store.was_notified(j.job_key, "new")]
-        removed_to_notify = [j for j in diff.removed if not store.was_notified(j.job_key, "removed")]
-        changed_to_notify = [
-            (old, new)
-            for old, new in diff.changed
-            if not store.was_notified(new.job_key, "changed")
-        ]
-
-        # Create filtered diff
-        filtered_diff = type(diff)()
-        filtered_diff.new = new_to_notify
-        filtered_diff.removed = removed_to_notify
-        filtered_diff.changed = changed_to_notify
-
-        # Print summary
-        print(f"Changes detected: +{len(diff.new)} new, -{len(diff.removed)} removed, ~{len(diff.changed)} changed")
+    config = get_config()
+    store = JobStore(config["state_db_path"])
+    rows = store.query_jobs(
+        city=city or None,
+        since=since_date,
+        until=until_date,
+        min_wage=min_wage,
+        max_wage=max_wage,
+        text=text or None,
+        include_archive=archive,
+        archive_path=config["archive_db_path"] or None,
+        limit=limit,
+    )
+    for row in rows:
+        wage = f"{row['wage_czk']} Kč/h" if row["wage_czk"] is not None else "-"
+        hours = f"{row['hours']:g}h" if row["hours"] is not None else "-"
         print(
-            f"To notify: +{len(new_to_notify)} new, "
-            f"-{len(removed_to_notify)} removed, ~{len(changed_to_notify)} changed"
+            f"{row['date_iso'] or '-':<10}  {row['city']:<16}  {wage:>9}  {hours:>5}  "
+            f"{row['title']}{'  (re-post)' if row['duplicate_of'] else ''}{'  (archived)' if row['archived'] else ''}"
         )
+    print(f"{len(rows)} jobs")
 
-        # Send notification only for NEW jobs
-        if new_to_notify:
-            # Create a diff with only new jobs for the email
-            new_only_diff = type(diff)()
-            new_only_diff.new = new_to_notify
-            new_only_diff.removed = []
-            new_only_diff.changed = []
-            print("Sending email notification for new jobs...")
-            if send_notification(new_only_diff, config["watch_url"]):
-                print("Email sent successfully")
-
-                # Mark as notified
-                for job in new_to_notify:
-                    store.mark_notified(job.job_key, "new")
-            else:
-                print("ERROR: Failed to send email")
-        else:
-            print("No new jobs to notify")
-        # Mark removed/changed as notified without sending email
-        for job in removed_to_notify:
-            store.mark_notified(job.job_key, "removed")
-        for old, new in changed_to_notify:
-            store.mark_notified(new.job_key, "changed")
-
-        return len(new_to_notify) > 0 or len(removed_to_notify) > 0 or len(changed_to_notify) > 0
 
-    if once:
-        check_once()
-        store._close_connection()
-    else:
-        while True:
-            try:
-                check_once()
-                print(f"Waiting {config['check_interval_minutes']} minutes until next check...")
-                time.sleep(config["check_interval_minutes"] * 60)
-            except KeyboardInterrupt:
-                print("\nStopping watcher...")
-                sys.exit(0)
+@app.command()
+def stats(
+    since: str = typer.Option("", help="First listing date, YYYY-MM-DD"),
+    until: str = typer.Option("", help="Last listing date, YYYY-MM-DD"),
+    city: str = typer.Option("", help="Only this city"),
+    daily: bool = typer.Option(False, "--daily", help="One row per listing day instead of per city"),
+):
+    """Show job counts, wages and hours posted, from the rollup tables."""
+    try:
+        since_date = date.fromisoformat(since) if since else None
+        until_date = date.fromisoformat(until) if until else None
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        raise typer.Exit(1)
+
+    by = "day" if daily else "city"
+    store = JobStore(get_config()["state_db_path"])
+    rows = store.rollup_stats(since=since_date, until=until_date, city=city or None, by=by)
+
+    print(
+        f"{by.capitalize():<16}  {'Posted':>7}  {'Listed':>7}  {'Median':>8}  {'Mean':>8}  "
+        f"{'Hours':>8}  {'Weekend h':>9}"
+    )
+    for row in rows:
+        median = f"{row['median_wage']:g}" if row["median_wage"] is not None else "-"
+        mean = f"{row['mean_wage']:.1f}" if row["mean_wage"] is not None else "-"
+        print(
+            f"{row[by]:<16}  {row['posted']:>7}  {row['active']:>7}  {median:>8}  {mean:>8}  "
+            f"{row['hours']:>8g}  {row['weekend_hours']:>9g}"
+        )
+
+
+@app.command()
+def replay(
+    db: Path = typer.Argument(..., help="New state DB to build (must not exist)"),
+    snapshots: str = typer.Option("", help="Snapshot archive directory (default: SNAPSHOT_DIR)"),
+    workers: int = typer.Option(0, help="Parser processes (0 = one per CPU)"),
+):
+    """Rebuild job history from archived page snapshots into a fresh DB."""
+    from watcher.replay import replay as replay_snapshots
+
+    config = get_config()
+    root = snapshots or config["snapshot_dir"]
+    if not root or not Path(root).is_dir():
+        print(f"ERROR: Snapshot archive {root or '(SNAPSHOT_DIR not set)'} not found")
+        raise typer.Exit(1)
+
+    start = time.perf_counter()
+    try:
+        totals = replay_snapshots(root, str(db), workers, channels=config["notify_channels"])
+    except FileExistsError as e:
+        print(f"ERROR: {e}")
+        raise typer.Exit(1)
+    print(
+        f"Replayed {totals['captures']} captures ({totals['pages']} distinct pages) "
+        f"of {totals['targets']} targets in {time.perf_counter() - start:.1f}s"
+    )
+    print(f"Wrote {totals['jobs']} jobs and {totals['notifications']} notifications to {db}")
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-"""Change detection between old and new job sets."""
+"""Change detection between old and new job sets (or page blocks)."""
 
 from typing import Dict, List, Tuple
 
@@ -12,6 +12,16 @@ class JobDiff:
         self.new: List[Job] = []
         self.removed: List[Job] = []
         self.changed: List[Tuple[Job, Job]] = []  # (old, new)
+        # New job key -> earlier job it re-posts (NEAR_DUP_MODE=group)
+        self.reposts: Dict[str, Job] = {}
+
+
+class BlockDiff:
+    """Represents text blocks added to or removed from a page (block mode)."""
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.removed: List[str] = []
 
 
 def compute_diff(old_jobs: Dict[str, Job], new_jobs: Dict[str, Job]) -> JobDiff:
@@ -1,39 +1,91 @@
 """HTTP client with retry logic and anti-bot hygiene."""
 
 import time
-from typing import Optional
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
 
-import httpx
+from watcher.httpcache import HttpCache
 
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "cs,en;q=0.9",
+}
 
-def fetch_url(url: str, max_retries: int = 3, timeout: float = 30.0) -> Optional[str]:
+
+@dataclass
+class FetchResult:
+    """Outcome of a (possibly conditional) page fetch."""
+
+    status_code: int
+    text: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Decoded body as it arrives (stream_page only; text stays None)
+    chunks: Optional[Iterator[str]] = field(default=None, repr=False)
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+def fetch_page(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    max_retries: int = 3,
+    timeout: float = 30.0,
+    cache: Optional[HttpCache] = None,
+) -> Optional[FetchResult]:
     """
-    Fetch a URL with retry logic and exponential backoff.
+    Fetch a URL, sending conditional request headers when validators are known.
 
     Args:
         url: URL to fetch
+        etag: ETag from the previous response (sent as If-None-Match)
+        last_modified: Last-Modified from the previous response (sent as If-Modified-Since)
         max_retries: Maximum number of retry attempts
         timeout: Request timeout in seconds
+        cache: HTTP cache to answer from and record into
 
     Returns:
-        HTML content as string, or None if all retries failed
+        FetchResult (status 304 with no text if the page is unchanged),
+        or None if all retries failed (or the page is not cached in replay mode)
     """
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        ),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "cs,en;q=0.9",
-    }
+    if cache is not None:
+        cached = _cached(cache, url, etag, last_modified)
+        if cached is not None or cache.mode == "replay":
+            return cached
+
+    import httpx  # deferred: only needed once we actually go to the network
+
+    headers = _request_headers(etag, last_modified)
 
     with httpx.Client(timeout=timeout, follow_redirects=True) as client:
         for attempt in range(max_retries):
             try:
                 response = client.get(url, headers=headers)
+                if response.status_code == 304:
+                    return FetchResult(
+                        status_code=304,
+                        etag=response.headers.get("ETag", etag),
+                        last_modified=response.headers.get("Last-Modified", last_modified),
+                    )
                 response.raise_for_status()
-                return response.text
+                result = FetchResult(
+                    status_code=response.status_code,
+                    text=response.text,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+                if cache is not None:
+                    cache.put(url, HEADERS, result.status_code, result.text, result.etag, result.last_modified)
+                return result
             except httpx.HTTPStatusError as e:
                 if e.response.status_code == 404:
                     return None
@@ -50,3 +102,150 @@ def fetch_url(url: str, max_retries: int = 3, timeout: float = 30.0) -> Optional
                 return None
 
     return None
+
+
+@contextmanager
+def stream_page(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    max_retries: int = 3,
+    timeout: float = 30.0,
+    chunk_size: int = 65536,
+    cache: Optional[HttpCache] = None,
+) -> Iterator[Optional[FetchResult]]:
+    """
+    Fetch a URL like fetch_page, but hand over the body as it arrives.
+
+    Retries cover connecting and the response status only; once the body
+    is being read, a failure raises ConnectionError from ``chunks``.
+    Leaving the ``with`` block closes the connection, so a reader that
+    stops early never downloads the rest of the page. A page is recorded
+    into ``cache`` only if it was read to the end.
+
+    Args:
+        url: URL to fetch
+        etag: ETag from the previous response (sent as If-None-Match)
+        last_modified: Last-Modified from the previous response (sent as If-Modified-Since)
+        max_retries: Maximum number of retry attempts
+        timeout: Request timeout in seconds
+        chunk_size: Characters per chunk
+        cache: HTTP cache to answer from and record into
+
+    Yields:
+        FetchResult with ``chunks`` set (status 304 without chunks if the page
+        is unchanged), or None if all retries failed (or the page is not
+        cached in replay mode)
+    """
+    if cache is not None:
+        cached = _cached(cache, url, etag, last_modified)
+        if cached is not None or cache.mode == "replay":
+            if cached is not None and cached.text is not None:
+                text = cached.text
+                cached.chunks = (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+            yield cached
+            return
+
+    import httpx
+
+    headers = _request_headers(etag, last_modified)
+
+    with httpx.Client(timeout=timeout, follow_redirects=True) as client:
+        response = None
+        for attempt in range(max_retries):
+            try:
+                response = client.send(client.build_request("GET", url, headers=headers), stream=True)
+            except (httpx.RequestError, httpx.TimeoutException):
+                response = None
+            else:
+                if response.status_code == 304 or response.is_success:
+                    break
+                response.close()
+                if response.status_code == 404:
+                    response = None
+                    break
+                response = None
+            if attempt < max_retries - 1:
+                time.sleep(2 ** attempt)
+
+        if response is None:
+            yield None
+            return
+        try:
+            if response.status_code == 304:
+                yield FetchResult(
+                    status_code=304,
+                    etag=response.headers.get("ETag", etag),
+                    last_modified=response.headers.get("Last-Modified", last_modified),
+                )
+            else:
+                result = FetchResult(
+                    status_code=response.status_code,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    chunks=_iter_text(response, url, chunk_size),
+                )
+                if cache is not None and cache.records:
+                    result.chunks = _recorded(result, cache, url)
+                yield result
+        finally:
+            response.close()
+
+
+def _cached(cache: HttpCache, url: str, etag: Optional[str], last_modified: Optional[str]) -> Optional[FetchResult]:
+    """Answer a request from the cache, with a 304 if the caller's validators still match."""
+    entry = cache.get(url, HEADERS)
+    if entry is None:
+        return None
+    # Like a server, If-None-Match wins over If-Modified-Since
+    if (etag and etag == entry["etag"]) or (not etag and last_modified and last_modified == entry["last_modified"]):
+        return FetchResult(status_code=304, etag=entry["etag"], last_modified=entry["last_modified"])
+    return FetchResult(
+        status_code=entry["status_code"],
+        text=entry["text"],
+        etag=entry["etag"],
+        last_modified=entry["last_modified"],
+    )
+
+
+def _recorded(result: FetchResult, cache: HttpCache, url: str) -> Iterator[str]:
+    """Pass a streamed body through and cache it once it has been read to the end."""
+    parts = []
+    for chunk in result.chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.put(url, HEADERS, result.status_code, "".join(parts), result.etag, result.last_modified)
+
+
+def _iter_text(response, url: str, chunk_size: int) -> Iterator[str]:
+    import httpx
+
+    try:
+        yield from response.iter_text(chunk_size)
+    except httpx.HTTPError as e:
+        raise ConnectionError(f"Reading {url} failed: {e}") from e
+
+
+def _request_headers(etag: Optional[str], last_modified: Optional[str]) -> dict:
+    headers = dict(HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def fetch_url(url: str, max_retries: int = 3, timeout: float = 30.0) -> Optional[str]:
+    """
+    Fetch a URL with retry logic and exponential backoff.
+
+    Args:
+        url: URL to fetch
+        max_retries: Maximum number of retry attempts
+        timeout: Request timeout in seconds
+
+    Returns:
+        HTML content as string, or None if all retries failed
+    """
+    result = fetch_page(url, max_retries=max_retries, timeout=timeout)
+    return result.text if result else None
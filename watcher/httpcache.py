@@ -0,0 +1,123 @@
+"""
+On-disk HTTP cache for the fetch layer, with record and replay modes.
+
+Responses are stored one gzip-compressed JSON file per request, keyed by
+the URL and the request headers. Conditional headers (If-None-Match,
+If-Modified-Since) are not part of the key: the fetch layer answers them
+from the cached validators, the way the server would. The modes are:
+
+- off: nothing is read from or written to disk
+- record: entries younger than the TTL are served; other requests go to
+  the network and their responses are stored
+- replay: only stored entries are served, whatever their age, and a
+  request that is not in the cache fails instead of going to the network
+
+In every mode, a page read in full is kept in memory for the rest of the
+run, so a target listed twice is fetched once.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+HTTP_CACHE_MODES = ("off", "record", "replay")
+
+# Validators are answered from the cached entry, so they never split the key
+_CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since"}
+
+
+class HttpCache:
+    """Stores full (2xx) responses by URL and request headers."""
+
+    def __init__(self, directory: str = "", mode: str = "off", ttl: float = 3600.0):
+        """
+        Args:
+            directory: Cache directory (required unless mode is "off")
+            mode: One of HTTP_CACHE_MODES
+            ttl: Seconds a recorded entry is served in record mode (0 = forever)
+
+        Raises:
+            ValueError: If the mode is unknown or needs a directory and has none
+        """
+        if mode not in HTTP_CACHE_MODES:
+            raise ValueError(f"HTTP cache mode must be one of {', '.join(HTTP_CACHE_MODES)}, not {mode!r}")
+        if mode != "off" and not directory:
+            raise ValueError(f"HTTP cache mode {mode!r} needs a cache directory")
+        self.directory = Path(directory) if directory else None
+        self.mode = mode
+        self.ttl = ttl
+        self._memo: Dict[str, dict] = {}
+
+    @property
+    def records(self) -> bool:
+        """Whether responses fetched from the network are written to disk."""
+        return self.mode == "record"
+
+    @staticmethod
+    def key(url: str, headers: Dict[str, str]) -> str:
+        """Cache key of a request (conditional headers are ignored)."""
+        request = [url, sorted((k.lower(), v) for k, v in headers.items() if k.lower() not in _CONDITIONAL_HEADERS)]
+        return hashlib.sha256(json.dumps(request, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json.gz"
+
+    def get(self, url: str, headers: Dict[str, str]) -> Optional[dict]:
+        """
+        Look up a stored response.
+
+        Returns:
+            Entry with "status_code", "text", "etag", "last_modified" and
+            "stored_at", or None if there is none (or it expired in record mode)
+        """
+        key = self.key(url, headers)
+        if key in self._memo:
+            return self._memo[key]
+        if self.mode == "off":
+            return None
+        try:
+            with gzip.open(self._path(key), "rb") as f:
+                entry = json.loads(f.read().decode("utf-8"))
+        except (OSError, ValueError):
+            entry = None  # missing or unreadable: treat as not cached
+        if entry is None or (self.mode == "record" and 0 < self.ttl < time.time() - entry["stored_at"]):
+            if self.mode == "replay":
+                print(f"ERROR: {url} is not in the HTTP cache (replay mode)")
+            return None
+        self._memo[key] = entry
+        return entry
+
+    def put(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        status_code: int,
+        text: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        """Keep a full response for the rest of the run, and on disk in record mode."""
+        key = self.key(url, headers)
+        entry = {
+            "url": url,
+            "status_code": status_code,
+            "text": text,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+        }
+        self._memo[key] = entry
+        if not self.records:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the entry and rename, so a crash never leaves half an entry
+        # (per process: workers may record the same page at once)
+        tmp_path = Path(f"{path}.{os.getpid()}.tmp")
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            f.write(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        tmp_path.replace(path)
@@ -1,8 +1,36 @@
 """Data models for job listings."""
 
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
+import re
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from typing import Dict, Optional
+
+_DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def parse_job_date(text: str) -> Optional[date]:
+    """Parse a Czech listing date such as "26.1.2026" (None if missing or invalid)."""
+    match = _DATE_RE.search(text or "")
+    if not match:
+        return None
+    day, month, year = (int(g) for g in match.groups())
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_wage(text: str) -> Optional[int]:
+    """Parse an hourly wage such as "180 Kč/h" into whole CZK (None if missing)."""
+    match = _NUMBER_RE.search(text or "")
+    return int(float(match.group(0).replace(",", "."))) if match else None
+
+
+def parse_hours(text: str) -> Optional[float]:
+    """Parse a shift length such as "8" or "4.5" into hours (None if missing)."""
+    match = _NUMBER_RE.search(text or "")
+    return float(match.group(0).replace(",", ".")) if match else None
 
 
 @dataclass
@@ -20,6 +48,8 @@ class Job:
     job_key: Optional[str] = None
     first_seen: Optional[datetime] = None
     last_seen: Optional[datetime] = None
+    # Key of the earlier job this one re-posts (NEAR_DUP_MODE=group)
+    duplicate_of: Optional[str] = None
 
     def normalize_text(self) -> str:
         """Normalize text for key generation."""
@@ -35,3 +65,17 @@ class Job:
         import hashlib
         normalized = self.normalize_text()
         return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def job_to_dict(job: Job) -> Dict[str, Optional[str]]:
+    """
+    JSON-ready representation of a job, as served by the API and webhooks.
+
+    last_seen is left out: it moves on every check and would change the
+    API's ETag even when the listings did not.
+    """
+    data = asdict(job)
+    del data["last_seen"]
+    if data["first_seen"] is not None:
+        data["first_seen"] = data["first_seen"].isoformat()
+    return data
@@ -1,13 +1,305 @@
-"""Email notification via SMTP."""
+"""
+Notifications about job changes (or changed blocks of a watched page).
 
+Each channel is a Notifier: email over SMTP, an HTTP webhook, or a JSONL
+file (or stdout). ``dispatch`` sends to all channels at once, each in its
+own thread with its own timeout, and reports delivery per channel, so a
+slow or failing channel never holds up or fails the others.
+
+Email bodies come from string.Template templates (plain text and HTML)
+built once at import. Each job's block is cached on the content it shows,
+so a job listed again in a later digest is not rendered twice.
+"""
+
+import html
+import json
 import os
-import smtplib
-from email.mime.text import MIMEText
+import sys
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from string import Template
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from watcher.diff import BlockDiff, JobDiff
+from watcher.models import Job, job_to_dict
+
+# Job changes, or block changes of a page watched in block mode
+Diff = Union[JobDiff, BlockDiff]
+
+# Rendered job blocks kept across sends and checks (plain and HTML count separately)
+FRAGMENT_CACHE_SIZE = 32768
+
+# dispatch waits this many times a channel's own timeout before moving on. A
+# send is several calls that may each take up to the timeout (SMTP connects,
+# logs in and sends), so one that is slow but delivers must not be cut off.
+DISPATCH_DEADLINE_FACTOR = 3
+
+
+class Notifier(ABC):
+    """A notification channel. ``send`` reports success instead of raising."""
+
+    name = ""
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+
+    def is_configured(self) -> bool:
+        """Whether the channel has everything it needs to send."""
+        return True
+
+    @abstractmethod
+    def send(self, diff: Diff, url: str) -> bool:
+        """
+        Deliver a notification about a diff.
+
+        Args:
+            diff: JobDiff or BlockDiff with changes
+            url: URL being monitored
+
+        Returns:
+            True if the notification was delivered, False otherwise
+        """
+
+
+class EmailNotifier(Notifier):
+    """Plain-text and HTML email over SMTP (SMTPS on port 465, STARTTLS otherwise)."""
+
+    name = "email"
+
+    def __init__(
+        self,
+        host: Optional[str],
+        port: int,
+        user: Optional[str],
+        password: Optional[str],
+        sender: Optional[str],
+        recipients: List[str],
+        starttls: bool = True,
+        timeout: float = 30.0,
+    ):
+        super().__init__(timeout)
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.sender = sender
+        self.recipients = recipients
+        self.starttls = starttls
+
+    @classmethod
+    def from_env(cls) -> "EmailNotifier":
+        """Build from the SMTP_* and EMAIL_* environment variables."""
+        email_to = os.getenv("EMAIL_TO", "")
+        return cls(
+            host=os.getenv("SMTP_HOST"),
+            port=int(os.getenv("SMTP_PORT", "587")),
+            user=os.getenv("SMTP_USER"),
+            password=os.getenv("SMTP_PASS"),
+            sender=os.getenv("EMAIL_FROM"),
+            # Parse comma-separated recipients
+            recipients=[addr.strip() for addr in email_to.split(",") if addr.strip()],
+            starttls=os.getenv("SMTP_STARTTLS", "true").lower() not in ("0", "false", "no"),
+            timeout=float(os.getenv("SMTP_TIMEOUT", "30")),
+        )
+
+    def is_configured(self) -> bool:
+        return all([self.host, self.user, self.password, self.sender, self.recipients])
+
+    def send(self, diff: Diff, url: str) -> bool:
+        if not self.is_configured():
+            return False
+
+        body = render_body(diff, url)
+        if not body:
+            return False  # No changes to notify
+
+        # Deferred so runs without anything to send never load the mail stack
+        import smtplib
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        # Build subject
+        if isinstance(diff, BlockDiff):
+            subject = (
+                f"[Website Change Catcher] Update: "
+                f"+{len(diff.added)} added / "
+                f"-{len(diff.removed)} removed blocks"
+            )
+        else:
+            subject = (
+                f"[Website Change Catcher] Update: "
+                f"+{len(diff.new)} new / "
+                f"-{len(diff.removed)} removed / "
+                f"~{len(diff.changed)} changed"
+            )
 
-from watcher.diff import JobDiff
+        # Create message: plain text with an HTML alternative
+        msg = MIMEMultipart("alternative")
+        msg.attach(MIMEText(body, "plain", "utf-8"))
+        msg.attach(MIMEText(render_html(diff, url), "html", "utf-8"))
+        msg["Subject"] = subject
+        msg["From"] = self.sender
+        msg["To"] = ", ".join(self.recipients)
 
+        # Send email (strip spaces from app password)
+        password = self.password.replace(" ", "")
+        try:
+            if self.port == 465:
+                with smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout) as server:
+                    server.login(self.user, password)
+                    server.sendmail(self.sender, self.recipients, msg.as_string())
+            else:
+                with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as server:
+                    if self.starttls:
+                        server.starttls()
+                    server.login(self.user, password)
+                    server.sendmail(self.sender, self.recipients, msg.as_string())
+            return True
+        except Exception as e:
+            print(f"Email error: {e}")
+            return False
 
-def send_notification(diff: JobDiff, url: str) -> bool:
+
+class WebhookNotifier(Notifier):
+    """POST the changes as JSON to an HTTP endpoint; any 2xx counts as delivered."""
+
+    name = "webhook"
+
+    def __init__(self, webhook_url: str, timeout: float = 10.0):
+        super().__init__(timeout)
+        self.webhook_url = webhook_url
+
+    def is_configured(self) -> bool:
+        return bool(self.webhook_url)
+
+    def send(self, diff: Diff, url: str) -> bool:
+        if not self.is_configured():
+            return False
+
+        import httpx
+
+        try:
+            response = httpx.post(self.webhook_url, json=render_payload(diff, url), timeout=self.timeout)
+        except httpx.HTTPError as e:
+            print(f"Webhook error: {e}")
+            return False
+        if not response.is_success:
+            print(f"Webhook error: HTTP {response.status_code}")
+            return False
+        return True
+
+
+class FileNotifier(Notifier):
+    """Append one JSON line per change (job or block) to a file ("-" writes to stdout)."""
+
+    name = "file"
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        super().__init__(timeout)
+        self.path = path
+
+    def is_configured(self) -> bool:
+        return bool(self.path)
+
+    def send(self, diff: Diff, url: str) -> bool:
+        if not self.is_configured():
+            return False
+
+        payload = render_payload(diff, url)
+        if isinstance(diff, BlockDiff):
+            field, change_types = "text", ("added", "removed")
+        else:
+            field, change_types = "job", ("new", "removed", "changed")
+        lines = "".join(
+            json.dumps({"type": change_type, "url": url, "at": payload["at"], field: item}, ensure_ascii=False) + "\n"
+            for change_type in change_types
+            for item in payload[change_type]
+        )
+        try:
+            if self.path == "-":
+                sys.stdout.write(lines)
+                sys.stdout.flush()
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+            return True
+        except OSError as e:
+            print(f"File notification error: {e}")
+            return False
+
+
+def get_notifiers(config: dict) -> List[Notifier]:
+    """
+    Build the channels listed in config["notify_channels"].
+
+    Raises:
+        ValueError: If a channel name is unknown
+    """
+    notifiers: List[Notifier] = []
+    for name in config["notify_channels"]:
+        if name == "email":
+            notifiers.append(EmailNotifier.from_env())
+        elif name == "webhook":
+            notifiers.append(WebhookNotifier(config["webhook_url"], config["webhook_timeout"]))
+        elif name == "file":
+            notifiers.append(FileNotifier(config["notify_file"]))
+        else:
+            raise ValueError(f"Unknown notification channel: {name}")
+    return notifiers
+
+
+def dispatch(
+    pending: Dict[Notifier, Diff],
+    url: str,
+    on_late: Optional[Callable[[str, bool], None]] = None,
+) -> Dict[str, Optional[bool]]:
+    """
+    Send each channel its diff concurrently.
+
+    Every channel gets its own thread. dispatch waits for a channel up to
+    DISPATCH_DEADLINE_FACTOR times its timeout; a channel still sending
+    then is neither delivered nor failed. Its thread is left to finish in
+    the background and reports the outcome through ``on_late``.
+
+    Args:
+        pending: Diff to send per channel
+        url: URL being monitored
+        on_late: Called with (channel name, delivered) when a channel that
+            was still sending finishes
+
+    Returns:
+        Delivery status per channel name: True, False, or None if still sending
+    """
+    if not pending:
+        return {}
+    executor = ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="notify")
+    start = time.monotonic()
+    futures = {notifier: executor.submit(notifier.send, diff, url) for notifier, diff in pending.items()}
+    results: Dict[str, Optional[bool]] = {}
+    for notifier, future in futures.items():
+        remaining = max(0.0, start + notifier.timeout * DISPATCH_DEADLINE_FACTOR - time.monotonic())
+        try:
+            results[notifier.name] = bool(future.result(timeout=remaining))
+        except Exception as e:
+            if future.done():
+                print(f"{notifier.name} notification failed: {e}")
+                results[notifier.name] = False
+                continue
+            print(f"{notifier.name} notification is still sending, leaving it to finish")
+            results[notifier.name] = None
+            if on_late is not None:
+                future.add_done_callback(lambda f, name=notifier.name: on_late(name, _delivered(f)))
+    executor.shutdown(wait=False)
+    return results
+
+
+def _delivered(future: Future) -> bool:
+    return future.exception() is None and bool(future.result())
+
+
+def send_notification(diff: Diff, url: str) -> bool:
     """
     Send email notification about job changes.
 
@@ -18,97 +310,209 @@ def send_notification(diff: JobDiff, url: str) -> bool:
     Returns:
         True if email was sent successfully, False otherwise
     """
-    smtp_host = os.getenv("SMTP_HOST")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_pass = os.getenv("SMTP_PASS")
-    email_from = os.getenv("EMAIL_FROM")
-    email_to = os.getenv("EMAIL_TO", "")
-
-    if not all([smtp_host, smtp_user, smtp_pass, email_from, email_to]):
-        return False
-
-    # Build email body
-    body_parts = []
-
-    if diff.new:
-        body_parts.append("=== NEW JOBS ===\n")
-        for job in diff.new:
-            body_parts.append(f"Title: {job.title}")
-            body_parts.append(f"Location: {job.city}")
-            body_parts.append(f"Date: {job.date}")
-            body_parts.append(f"Day of week: {getattr(job, 'day_of_week', '') or '-'}")
-            body_parts.append(f"Time: {job.time_range}")
-            body_parts.append(f"Duration: {job.duration_hours}h")
-            body_parts.append(f"Wage: {job.wage_czk_per_h}")
-            body_parts.append(f"Raw: {job.raw_text[:200]}")
-            body_parts.append("")
-
-    if diff.removed:
-        body_parts.append("=== REMOVED JOBS ===\n")
-        for job in diff.removed:
-            body_parts.append(f"Title: {job.title}")
-            body_parts.append(f"Location: {job.city}")
-            body_parts.append(f"Date: {job.date}")
-            body_parts.append(f"Day of week: {getattr(job, 'day_of_week', '') or '-'}")
-            body_parts.append(f"Time: {job.time_range}")
-            body_parts.append(f"Wage: {job.wage_czk_per_h}")
-            body_parts.append("")
-
-    if diff.changed:
-        body_parts.append("=== CHANGED JOBS ===\n")
-        for old_job, new_job in diff.changed:
-            body_parts.append(f"Title: {old_job.title} -> {new_job.title}")
-            body_parts.append(f"Location: {old_job.city} -> {new_job.city}")
-            body_parts.append(f"Date: {old_job.date} -> {new_job.date}")
-            old_dow = getattr(old_job, 'day_of_week', '') or '-'
-            new_dow = getattr(new_job, 'day_of_week', '') or '-'
-            body_parts.append(f"Day of week: {old_dow} -> {new_dow}")
-            body_parts.append(f"Time: {old_job.time_range} -> {new_job.time_range}")
-            body_parts.append(f"Duration: {old_job.duration_hours}h -> {new_job.duration_hours}h")
-            body_parts.append(f"Wage: {old_job.wage_czk_per_h} -> {new_job.wage_czk_per_h}")
-            body_parts.append("")
-
-    if not body_parts:
-        return False  # No changes to notify
-
-    # Add footer
+    return EmailNotifier.from_env().send(diff, url)
+
+
+def render_payload(diff: Diff, url: str) -> dict:
+    """
+    Render a diff as a JSON-ready payload for machine consumers.
+
+    Returns:
+        {"url", "at", "new": [job...], "removed": [job...], "changed": [new job...]},
+        or {"url", "at", "added": [text...], "removed": [text...]} for a BlockDiff
+    """
     from datetime import datetime
-    body_parts.append(f"\n---\nChecked at: {datetime.now().isoformat()}")
-    body_parts.append(f"URL: {url}")
 
-    body = "\n".join(body_parts)
+    if isinstance(diff, BlockDiff):
+        return {"url": url, "at": datetime.now().isoformat(), "added": diff.added, "removed": diff.removed}
+    return {
+        "url": url,
+        "at": datetime.now().isoformat(),
+        "new": [job_to_dict(job) for job in diff.new],
+        "removed": [job_to_dict(job) for job in diff.removed],
+        "changed": [job_to_dict(new) for _, new in diff.changed],
+    }
+
+
+def render_body(diff: Diff, url: str) -> str:
+    """
+    Render the plain-text email body for a diff.
+
+    Args:
+        diff: JobDiff or BlockDiff with changes
+        url: URL being monitored
+
+    Returns:
+        Email body, or an empty string if the diff has nothing to report
+    """
+    return _render(diff, url, "text")
+
 
-    # Build subject
-    subject = (
-        f"[Website Change Catcher] Update: "
-        f"+{len(diff.new)} new / "
-        f"-{len(diff.removed)} removed / "
-        f"~{len(diff.changed)} changed"
+def render_html(diff: Diff, url: str) -> str:
+    """
+    Render the HTML email body for a diff.
+
+    Args:
+        diff: JobDiff or BlockDiff with changes
+        url: URL being monitored
+
+    Returns:
+        HTML document, or an empty string if the diff has nothing to report
+    """
+    return _render(diff, url, "html")
+
+
+def _render(diff: Diff, url: str, fmt: str) -> str:
+    templates = _TEMPLATES[fmt]
+    sections = []
+    if isinstance(diff, BlockDiff):
+        groups = (
+            ("added_block", [("added_block", (text,)) for text in diff.added]),
+            ("removed_block", [("removed_block", (text,)) for text in diff.removed]),
+        )
+    else:
+        groups = (
+            ("new", [_new_job_fields(job, diff.reposts.get(job.job_key)) for job in diff.new]),
+            ("removed", [("removed", _job_fields(job)) for job in diff.removed]),
+            ("changed", [("changed", _job_fields(old) + _job_fields(new)) for old, new in diff.changed]),
+        )
+    for heading, items in groups:
+        if items:
+            fragments = "".join(_render_fragment(fmt, kind, fields) for kind, fields in items)
+            sections.append(templates["section"].substitute(heading=_HEADINGS[fmt][heading], jobs=fragments))
+    if not sections:
+        return ""
+
+    from datetime import datetime
+
+    return templates["page"].substitute(
+        sections="".join(sections),
+        checked_at=datetime.now().isoformat(),
+        url=html.escape(url) if fmt == "html" else url,
     )
 
-    # Parse comma-separated recipients
-    recipients = [addr.strip() for addr in email_to.split(",") if addr.strip()]
-
-    # Create message
-    msg = MIMEText(body, "plain", "utf-8")
-    msg["Subject"] = subject
-    msg["From"] = email_from
-    msg["To"] = ", ".join(recipients)
-
-    # Send email (strip spaces from app password)
-    smtp_pass = smtp_pass.replace(" ", "")
-    try:
-        if smtp_port == 465:
-            with smtplib.SMTP_SSL(smtp_host, smtp_port) as server:
-                server.login(smtp_user, smtp_pass)
-                server.sendmail(email_from, recipients, msg.as_string())
-        else:
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_user, smtp_pass)
-                server.sendmail(email_from, recipients, msg.as_string())
-        return True
-    except Exception as e:
-        print(f"Email error: {e}")
-        return False
+
+_FIELDS = ("title", "city", "date", "day_of_week", "time_range", "duration_hours", "wage_czk_per_h", "raw")
+_CHANGED_FIELDS = tuple(f"old_{name}" for name in _FIELDS) + tuple(f"new_{name}" for name in _FIELDS)
+_REPOST_FIELDS = _FIELDS + ("original",)
+
+
+def _job_fields(job: Job) -> Tuple[str, ...]:
+    return (
+        job.title,
+        job.city,
+        job.date,
+        getattr(job, "day_of_week", "") or "-",
+        job.time_range,
+        job.duration_hours,
+        job.wage_czk_per_h,
+        job.raw_text[:200],
+    )
+
+
+def _new_job_fields(job: Job, original: Optional[Job]) -> Tuple[str, Tuple[str, ...]]:
+    """Fragment kind and fields of a new job, noting the earlier job it re-posts."""
+    if original is None:
+        return "new", _job_fields(job)
+    seen = f", first seen {original.first_seen:%d.%m.%Y}" if original.first_seen else ""
+    return "repost", _job_fields(job) + (f"{original.title} ({original.city}{seen})",)
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+def _render_fragment(fmt: str, kind: str, fields: Tuple[str, ...]) -> str:
+    """Render one job's block; keyed on the content it shows, so repeats are free."""
+    if fmt == "html":
+        fields = tuple(html.escape(value) for value in fields)
+    if kind.endswith("_block"):
+        return _TEMPLATES[fmt][kind].substitute(text=fields[0])
+    names = {"changed": _CHANGED_FIELDS, "repost": _REPOST_FIELDS}.get(kind, _FIELDS)
+    return _TEMPLATES[fmt][kind].substitute(dict(zip(names, fields)))
+
+
+_HEADINGS = {
+    "text": {
+        "new": "NEW JOBS", "removed": "REMOVED JOBS", "changed": "CHANGED JOBS",
+        "added_block": "ADDED TEXT", "removed_block": "REMOVED TEXT",
+    },
+    "html": {
+        "new": "New jobs", "removed": "Removed jobs", "changed": "Changed jobs",
+        "added_block": "Added text", "removed_block": "Removed text",
+    },
+}
+
+_TEMPLATES = {
+    "text": {
+        "page": Template("$sections\n---\nChecked at: $checked_at\nURL: $url"),
+        "section": Template("=== $heading ===\n\n$jobs"),
+        "new": Template(
+            "Title: $title\n"
+            "Location: $city\n"
+            "Date: $date\n"
+            "Day of week: $day_of_week\n"
+            "Time: $time_range\n"
+            "Duration: ${duration_hours}h\n"
+            "Wage: $wage_czk_per_h\n"
+            "Raw: $raw\n\n"
+        ),
+        "repost": Template(
+            "Title: $title\n"
+            "Re-post of: $original\n"
+            "Location: $city\n"
+            "Date: $date\n"
+            "Day of week: $day_of_week\n"
+            "Time: $time_range\n"
+            "Duration: ${duration_hours}h\n"
+            "Wage: $wage_czk_per_h\n"
+            "Raw: $raw\n\n"
+        ),
+        "removed": Template(
+            "Title: $title\n"
+            "Location: $city\n"
+            "Date: $date\n"
+            "Day of week: $day_of_week\n"
+            "Time: $time_range\n"
+            "Wage: $wage_czk_per_h\n\n"
+        ),
+        "changed": Template(
+            "Title: $old_title -> $new_title\n"
+            "Location: $old_city -> $new_city\n"
+            "Date: $old_date -> $new_date\n"
+            "Day of week: $old_day_of_week -> $new_day_of_week\n"
+            "Time: $old_time_range -> $new_time_range\n"
+            "Duration: ${old_duration_hours}h -> ${new_duration_hours}h\n"
+            "Wage: $old_wage_czk_per_h -> $new_wage_czk_per_h\n\n"
+        ),
+        "added_block": Template("$text\n\n"),
+        "removed_block": Template("$text\n\n"),
+    },
+    "html": {
+        "page": Template(
+            '<!DOCTYPE html>\n<html><head><meta charset="utf-8"></head><body>\n'
+            "$sections"
+            '<hr><p>Checked at: $checked_at<br>URL: <a href="$url">$url</a></p>\n'
+            "</body></html>\n"
+        ),
+        "section": Template("<h2>$heading</h2>\n<ul>\n$jobs</ul>\n"),
+        "new": Template(
+            "<li><b>$title</b> &ndash; $city<br>"
+            "$date ($day_of_week) $time_range, ${duration_hours}h, $wage_czk_per_h</li>\n"
+        ),
+        "repost": Template(
+            "<li><b>$title</b> &ndash; $city<br>"
+            "$date ($day_of_week) $time_range, ${duration_hours}h, $wage_czk_per_h<br>"
+            "<small>re-post of $original</small></li>\n"
+        ),
+        "removed": Template(
+            "<li><s><b>$title</b> &ndash; $city<br>"
+            "$date ($day_of_week) $time_range, $wage_czk_per_h</s></li>\n"
+        ),
+        "changed": Template(
+            "<li><b>$new_title</b> &ndash; $new_city<br>"
+            "$new_date ($new_day_of_week) $new_time_range, ${new_duration_hours}h, $new_wage_czk_per_h<br>"
+            "<small>was: $old_title &ndash; $old_city, $old_date ($old_day_of_week) $old_time_range, "
+            "${old_duration_hours}h, $old_wage_czk_per_h</small></li>\n"
+        ),
+        "added_block": Template('<li style="white-space: pre-wrap">$text</li>\n'),
+        "removed_block": Template('<li style="white-space: pre-wrap"><s>$text</s></li>\n'),
+    },
+}
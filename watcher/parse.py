@@ -1,12 +1,21 @@
 """HTML parsing to extract job listings."""
 
 import re
-from typing import List, Optional
-
-from selectolax.parser import HTMLParser
+from typing import Iterable, Iterator, List, Optional
 
 from watcher.models import Job
 
+# Target table rows that look like job listings:
+# Must contain » (bullet), date pattern, and wage (e.g. "181 Kč/h")
+_JOB_ROW_PATTERN = re.compile(
+    r"».*\d{1,2}\.\d{1,2}\.\d{4}.*\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}.*\(\d+(?:\.\d+)?\s*h\).*\d+\s*Kč"
+)
+_WAGE_PATTERN = re.compile(r"\d+\s*Kč\s*/?\s*h", re.I)
+
+# Tags that decide where a streamed page can be cut: table nesting and row ends
+_TABLE_TOKEN = re.compile(r"<(/?)table\b[^>]*>|</tr\s*>", re.I)
+_ROW_START = re.compile(r"<tr\b", re.I)
+
 
 def parse_html(html: str) -> List[Job]:
     """
@@ -14,20 +23,13 @@ def parse_html(html: str) -> List[Job]:
 
     Only extracts actual job rows: must have date, time, duration, and wage.
     """
+    from selectolax.parser import HTMLParser
+
     parser = HTMLParser(html)
     jobs = []
 
-    # Target table rows that look like job listings:
-    # Must contain » (bullet), date pattern, and wage (e.g. "181 Kč/h")
-    job_row_pattern = re.compile(
-        r"».*\d{1,2}\.\d{1,2}\.\d{4}.*\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}.*\(\d+(?:\.\d+)?\s*h\).*\d+\s*Kč"
-    )
-
     for tr in parser.tags("tr"):
-        text = tr.text(separator=" ", strip=True) if tr else ""
-        if not text or "»" not in text or not re.search(r"\d+\s*Kč\s*/?\s*h", text, re.I):
-            continue
-        if not job_row_pattern.search(text):
+        if not _is_job_row(tr):
             continue
 
         job = _parse_job_container(tr)
@@ -37,6 +39,133 @@ def parse_html(html: str) -> List[Job]:
     return jobs
 
 
+class RowExtractor:
+    """
+    Incremental job row extractor for a page that arrives in chunks.
+
+    Only complete rows are parsed: the text up to the last ``</tr>`` of a
+    top-level table is parsed as a table fragment and dropped, the rest
+    waits for the next chunk, so no DOM of the whole page is ever built.
+    Text outside tables is dropped as soon as it has been scanned.
+    Table nesting is tracked, so a row holding a nested table is never cut
+    inside it, and a job table inside a layout table counts as part of
+    that table. With ``stop_early``, the extractor is done once a
+    top-level table that held job rows closes, and the rest of the page is
+    not needed. Pages that omit ``</tr>`` still parse, a table at a time.
+    """
+
+    def __init__(self, stop_early: bool = False):
+        """
+        Args:
+            stop_early: Be done after the first top-level table with job rows.
+                Only safe for pages with a single job table: jobs in a later
+                table are never seen.
+        """
+        self.stop_early = stop_early
+        self.done = False
+        self._buffer = ""
+        self._scanned = 0  # tags before this offset of the buffer are counted in _depth
+        self._depth = 0
+        self._table_has_jobs = False
+
+    def feed(self, chunk: str) -> List[Job]:
+        """Add the next chunk of the page; returns jobs from the rows it completed."""
+        if self.done:
+            return []
+        buffer = self._buffer + chunk
+        jobs: List[Job] = []
+        start = row_end = 0
+        for match in _TABLE_TOKEN.finditer(buffer, self._scanned):
+            if match.end() == len(buffer):
+                break  # may be cut short by the chunk boundary; look again next time
+            self._scanned = match.end()
+            if match.group(1) is None:
+                if self._depth == 1:
+                    row_end = match.end()
+            elif not match.group(1):
+                self._depth += 1
+            elif self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    jobs.extend(self._parse(buffer[start:match.end()]))
+                    start = row_end = match.end()
+                    if self._table_has_jobs and self.stop_early:
+                        self.done = True
+                        self._buffer = ""
+                        return jobs
+                    self._table_has_jobs = False
+        jobs.extend(self._parse(buffer[start:row_end]))
+        if self._depth == 0:
+            # Nothing outside a table is parsed: keep only a tag the chunk may have cut short
+            row_end = self._tail_tag(buffer, max(self._scanned, row_end))
+        self._buffer = buffer[row_end:]
+        self._scanned = max(self._scanned - row_end, 0)
+        return jobs
+
+    @staticmethod
+    def _tail_tag(buffer: str, scanned: int) -> int:
+        """Offset of an unfinished or unscanned last tag at the end of the buffer (its length if none)."""
+        tail = buffer.rfind("<", scanned)
+        if tail == -1:
+            return len(buffer)
+        end = buffer.find(">", tail)
+        return tail if end in (-1, len(buffer) - 1) else len(buffer)
+
+    def close(self) -> List[Job]:
+        """Parse whatever is left once the page has ended."""
+        if self.done:
+            return []
+        self.done = True
+        jobs = self._parse(self._buffer)
+        self._buffer = ""
+        return jobs
+
+    def _parse(self, fragment: str) -> List[Job]:
+        if not _ROW_START.search(fragment):
+            return []
+        from selectolax.parser import HTMLParser
+
+        jobs = []
+        # Rows outside a table are dropped by the HTML parser
+        for tr in HTMLParser(f"<table>{fragment}</table>").tags("tr"):
+            if not _is_job_row(tr):
+                continue
+            self._table_has_jobs = True
+            job = _parse_job_container(tr)
+            if job and _is_valid_job(job):
+                jobs.append(job)
+        return jobs
+
+
+def iter_jobs(chunks: Iterable[str], stop_early: bool = False) -> Iterator[Job]:
+    """
+    Extract job listings from a page while it is still arriving.
+
+    Yields the same jobs as parse_html, each as soon as its row is
+    complete. With ``stop_early``, chunks are no longer pulled once the
+    first top-level table with job rows has closed, so a streamed download
+    can stop there; that is only right for pages with one job table.
+
+    Args:
+        chunks: Decoded text of the page, in order
+        stop_early: Stop after the first job table (default: read all chunks)
+    """
+    extractor = RowExtractor(stop_early)
+    for chunk in chunks:
+        yield from extractor.feed(chunk)
+        if extractor.done:
+            return
+    yield from extractor.close()
+
+
+def _is_job_row(tr) -> bool:
+    """Whether a table row looks like a job listing (before field parsing)."""
+    text = tr.text(separator=" ", strip=True) if tr else ""
+    if not text or "»" not in text or not _WAGE_PATTERN.search(text):
+        return False
+    return bool(_JOB_ROW_PATTERN.search(text))
+
+
 def _is_valid_job(job: Job) -> bool:
     """Only include jobs with all required fields (filters out noise)."""
     day = (job.day_of_week or "").strip().lower()
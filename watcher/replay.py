@@ -0,0 +1,224 @@
+"""
+Rebuild job history from archived page snapshots.
+
+Every distinct archived page is parsed once with the current parser, in a
+process pool. Diffs are then computed in capture order, and the resulting
+jobs and notification ledger are bulk-loaded into a fresh JobStore. Nothing
+is sent: the ledger records every change as already notified, so switching
+to the rebuilt DB does not re-announce old jobs.
+"""
+
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from watcher.diff import compute_diff
+from watcher.models import Job
+from watcher.snapshots import SnapshotEntry, SnapshotStore
+from watcher.store import JobStore
+
+# Parsed pages kept around in case the site flips back to an earlier version
+PARSED_CACHE_SIZE = 64
+
+# Pages handed to a worker at a time
+BATCH_SIZE = 32
+
+_worker_store: Optional[SnapshotStore] = None
+# History index per (archive, URL); reset whenever the worker is set up
+_worker_objects: Dict[Tuple[str, str], Dict[str, SnapshotEntry]] = {}
+
+
+def _init_worker(root: str) -> None:
+    global _worker_store
+    # A forked worker, or an earlier replay in this process, may have left
+    # another archive's store and index behind
+    if _worker_store is not None:
+        _worker_store.close()
+    _worker_objects.clear()
+    _worker_store = SnapshotStore(root)
+
+
+def _parse_snapshot(task: Tuple[str, str]) -> List[Job]:
+    """Read one archived page (memory-mapped) and parse it."""
+    from watcher.parse import parse_html
+
+    url, content_hash = task
+    key = (_worker_store.root, url)
+    if key not in _worker_objects:
+        _worker_objects[key] = {e.content_hash: e for e in _worker_store.history(url)}
+    return parse_html(_worker_store.read_with_index(url, _worker_objects[key], content_hash))
+
+
+def _parse_batch(tasks: List[Tuple[str, str]]) -> List[List[Job]]:
+    """Parse a run of consecutive pages; runs in a worker process."""
+    return [_parse_snapshot(task) for task in tasks]
+
+
+def _parsed_pages(
+    root: str,
+    url: str,
+    history: List[SnapshotEntry],
+    pool: Optional[ProcessPoolExecutor],
+    workers: int,
+) -> Iterator[List[Job]]:
+    """Yield parsed jobs for each distinct page, in order of first capture."""
+    seen = set()
+    tasks = []
+    for entry in history:
+        if entry.content_hash not in seen:
+            seen.add(entry.content_hash)
+            tasks.append((url, entry.content_hash))
+
+    if pool is None:
+        _init_worker(root)
+        yield from map(_parse_snapshot, tasks)
+        return
+
+    # Consecutive pages go to the same worker so delta chains stay warm in
+    # its cache; a bounded window of batches in flight caps memory use.
+    batch_size = max(1, min(BATCH_SIZE, len(tasks) // workers))
+    batches = (tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size))
+    in_flight: deque = deque()
+    for batch in batches:
+        in_flight.append(pool.submit(_parse_batch, batch))
+        if len(in_flight) >= workers * 2:
+            yield from in_flight.popleft().result()
+    while in_flight:
+        yield from in_flight.popleft().result()
+
+
+def replay_target(
+    root: str,
+    url: str,
+    pool: Optional[ProcessPoolExecutor],
+    workers: int,
+    jobs: Dict[str, list],
+    ledger: Dict[Tuple[str, str], datetime],
+) -> Dict[str, int]:
+    """
+    Replay one target's captures, accumulating rows into ``jobs`` and ``ledger``.
+
+    Args:
+        root: Snapshot archive directory
+        url: Target URL
+        pool: Worker pool for parsing (None parses in this process)
+        workers: Number of processes in the pool
+        jobs: job_key -> [Job, first_seen, last_seen, active, target], updated in place
+        ledger: (job_key, change_type) -> first notification time, updated in place
+
+    Returns:
+        Counts of captures and distinct pages replayed
+    """
+    store = SnapshotStore(root)
+    history = store.history(url)
+    parsed_pages = _parsed_pages(root, url, history, pool, workers)
+    cache: "OrderedDict[str, Dict[str, Job]]" = OrderedDict()
+    parsed = set()
+    current: Dict[str, Job] = {}
+    previous_taken: Optional[datetime] = None
+
+    for entry in history:
+        taken = datetime.fromisoformat(entry.taken_at)
+        if entry.content_hash not in parsed:
+            parsed.add(entry.content_hash)
+            page = {job.job_key: job for job in next(parsed_pages)}
+        elif entry.content_hash in cache:
+            page = cache[entry.content_hash]
+        else:
+            # Evicted earlier version that came back: parse it again here
+            from watcher.parse import parse_html
+
+            page = {job.job_key: job for job in parse_html(store.read(url, entry.content_hash))}
+        cache[entry.content_hash] = page
+        cache.move_to_end(entry.content_hash)
+        if len(cache) > PARSED_CACHE_SIZE:
+            cache.popitem(last=False)
+
+        diff = compute_diff(current, page)
+        for job in diff.new:
+            if job.job_key in jobs:
+                jobs[job.job_key][0] = job
+                jobs[job.job_key][4] = url
+            else:
+                jobs[job.job_key] = [job, taken, taken, 0, url]
+            ledger.setdefault((job.job_key, "new"), taken)
+        for job in diff.removed:
+            jobs[job.job_key][2] = previous_taken
+            ledger.setdefault((job.job_key, "removed"), taken)
+        for _, job in diff.changed:
+            jobs[job.job_key][0] = job
+            ledger.setdefault((job.job_key, "changed"), taken)
+
+        current = page
+        previous_taken = taken
+
+    for key in current:
+        jobs[key][2] = previous_taken
+        jobs[key][3] = 1
+
+    store.close()
+    return {"captures": len(history), "pages": len(parsed)}
+
+
+def replay(
+    root: str,
+    db_path: str,
+    workers: int = 0,
+    channels: Sequence[str] = ("email",),
+) -> Dict[str, int]:
+    """
+    Rebuild a fresh state DB from every target in a snapshot archive.
+
+    Args:
+        root: Snapshot archive directory
+        db_path: State DB to create (must not exist yet)
+        workers: Parser processes (0 = one per CPU, 1 = parse in this process)
+        channels: Notification channels new jobs are recorded as sent on
+
+    Returns:
+        Counts of targets, captures, distinct pages, jobs and ledger rows
+
+    Raises:
+        FileExistsError: If db_path already exists
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists; replay only writes a fresh DB")
+
+    workers = workers or os.cpu_count() or 1
+    jobs: Dict[str, list] = {}
+    ledger: Dict[Tuple[str, str], datetime] = {}
+    totals = {"targets": 0, "captures": 0, "pages": 0}
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(root,))
+    try:
+        for url in SnapshotStore(root).targets().values():
+            counts = replay_target(root, url, pool, workers, jobs, ledger)
+            totals["targets"] += 1
+            totals["captures"] += counts["captures"]
+            totals["pages"] += counts["pages"]
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    job_rows = [
+        (
+            job.job_key, job.title, job.city, job.date, job.day_of_week or "", job.time_range,
+            job.duration_hours, job.wage_czk_per_h, job.raw_text, first_seen, last_seen, active, target, None,
+        )
+        for job, first_seen, last_seen, active, target in jobs.values()
+    ]
+    # Removed/changed entries are bookkeeping only and, as in check_once, kept on email
+    ledger_rows = [
+        (key, change_type, at, channel)
+        for (key, change_type), at in ledger.items()
+        for channel in (channels if change_type == "new" else ("email",))
+    ]
+    JobStore(db_path).bulk_load({"jobs": job_rows, "notifications": ledger_rows, "fetch_state": []})
+
+    totals["jobs"] = len(job_rows)
+    totals["notifications"] = len(ledger_rows)
+    return totals
@@ -0,0 +1,465 @@
+"""
+Check cycle and configuration, kept free of heavy imports.
+
+The CLI and the fast ``python -m watcher --once`` path both run through this
+module. Third-party packages (httpx, selectolax, dotenv) and the mail stack
+are imported by the stage that needs them, so a run that ends early on a
+304 or an unchanged page never pays for parsing or SMTP.
+"""
+
+import hashlib
+import os
+import socket
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from watcher.diff import BlockDiff, JobDiff, compute_diff
+from watcher.fetch import FetchResult, fetch_page, stream_page
+from watcher.httpcache import HTTP_CACHE_MODES, HttpCache
+from watcher.models import Job
+from watcher.store import JobStore, is_expired
+
+# .env in project root (not shared, in .gitignore)
+ENV_PATH = Path(__file__).resolve().parent.parent / ".env"
+
+# "jobs" parses the job table; "blocks" reports changed text blocks of any page
+WATCH_MODES = ("jobs", "blocks")
+
+# Notification channels, as named in NOTIFY_CHANNELS
+NOTIFY_CHANNELS = ("email", "webhook", "file")
+DEFAULT_NOTIFY_CHANNELS = "email"
+
+# What to do with a new job that re-posts a recent shift in new words
+NEAR_DUP_MODES = ("off", "group", "suppress")
+
+
+def load_env() -> None:
+    """Load .env from the project root if there is one."""
+    if ENV_PATH.exists():
+        from dotenv import load_dotenv
+
+        load_dotenv(ENV_PATH)
+
+
+def get_config() -> dict:
+    """Load configuration from environment variables."""
+    # WATCH_URL may list several targets, comma-separated
+    watch_urls = [u.strip() for u in os.getenv("WATCH_URL", "https://brigoska.cz/cs/mista").split(",") if u.strip()]
+    watch_mode = os.getenv("WATCH_MODE", "jobs").strip().lower()
+    if watch_mode not in WATCH_MODES:
+        raise ValueError(f"WATCH_MODE must be one of {', '.join(WATCH_MODES)}, not {watch_mode!r}")
+    http_cache_mode = os.getenv("HTTP_CACHE_MODE", "off").strip().lower()
+    if http_cache_mode not in HTTP_CACHE_MODES:
+        raise ValueError(f"HTTP_CACHE_MODE must be one of {', '.join(HTTP_CACHE_MODES)}, not {http_cache_mode!r}")
+    # Checked up front: an unknown channel found mid-check would leave claims held
+    notify_channels = list(dict.fromkeys(
+        c.strip().lower() for c in os.getenv("NOTIFY_CHANNELS", DEFAULT_NOTIFY_CHANNELS).split(",") if c.strip()
+    ))
+    unknown = [c for c in notify_channels if c not in NOTIFY_CHANNELS]
+    if unknown:
+        raise ValueError(f"NOTIFY_CHANNELS may only list {', '.join(NOTIFY_CHANNELS)}, not {', '.join(unknown)}")
+    near_dup_mode = os.getenv("NEAR_DUP_MODE", "off").strip().lower()
+    if near_dup_mode not in NEAR_DUP_MODES:
+        raise ValueError(f"NEAR_DUP_MODE must be one of {', '.join(NEAR_DUP_MODES)}, not {near_dup_mode!r}")
+    return {
+        "watch_url": watch_urls[0],
+        "watch_urls": watch_urls,
+        "watch_mode": watch_mode,
+        "check_interval_minutes": int(os.getenv("CHECK_INTERVAL_MINUTES", "30")),
+        "state_db_path": os.getenv("STATE_DB_PATH", "./state.db"),
+        "retention_grace_days": int(os.getenv("RETENTION_GRACE_DAYS", "1")),
+        "archive_db_path": os.getenv("ARCHIVE_DB_PATH", ""),
+        "vacuum_pages": int(os.getenv("VACUUM_PAGES", "256")),
+        "snapshot_dir": os.getenv("SNAPSHOT_DIR", ""),
+        "stream_parse": os.getenv("STREAM_PARSE", "false").lower() in ("1", "true", "yes"),
+        "stream_stop_early": os.getenv("STREAM_STOP_EARLY", "false").lower() in ("1", "true", "yes"),
+        "http_cache_dir": os.getenv("HTTP_CACHE_DIR", ""),
+        "http_cache_mode": http_cache_mode,
+        "http_cache_ttl": float(os.getenv("HTTP_CACHE_TTL", "3600")),
+        "notify_channels": notify_channels,
+        "webhook_url": os.getenv("WEBHOOK_URL", ""),
+        "webhook_timeout": float(os.getenv("WEBHOOK_TIMEOUT", "10")),
+        "notify_file": os.getenv("NOTIFY_FILE", ""),
+        "lease_seconds": float(os.getenv("LEASE_SECONDS", "600")),
+        "near_dup_mode": near_dup_mode,
+        "near_dup_threshold": float(os.getenv("NEAR_DUP_THRESHOLD", "0.7")),
+        "near_dup_days": int(os.getenv("NEAR_DUP_DAYS", "7")),
+    }
+
+
+def worker_id() -> str:
+    """Identify this process in leases and notification claims."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def http_cache(config: dict) -> HttpCache:
+    """HTTP cache for one run (its in-memory part lasts as long as the object)."""
+    return HttpCache(config["http_cache_dir"], config["http_cache_mode"], config["http_cache_ttl"])
+
+
+def retention_cutoff(config: dict) -> date:
+    """First listing date that is still live; older jobs count as expired."""
+    return date.today() - timedelta(days=config["retention_grace_days"])
+
+
+def apply_retention(config: dict, store: JobStore) -> None:
+    """Archive expired jobs and release a bounded number of free pages."""
+    archived = store.archive_expired(retention_cutoff(config), config["archive_db_path"] or None)
+    if archived["jobs"]:
+        print(f"Archived {archived['jobs']} expired jobs and {archived['notifications']} notifications")
+    freed = store.compact(config["vacuum_pages"])
+    if freed:
+        print(f"Compaction released {freed} pages")
+
+
+def check_all(config: dict, store: JobStore) -> bool:
+    """
+    Check every configured target that no other worker is checking.
+
+    Each target is leased in the state DB for the duration of its check, so
+    several processes sharing a DB split the targets between them instead
+    of checking (and notifying) the same one twice.
+
+    Returns:
+        True if changes were found on any target
+    """
+    owner = worker_id()
+    cache = http_cache(config)
+    changed = False
+    for url in config["watch_urls"]:
+        lease = f"target:{url}"
+        if not store.acquire_lease(lease, owner, config["lease_seconds"]):
+            print(f"Skipping {url}: another worker is checking it")
+            continue
+        try:
+            changed = check_once(config, store, url, cache) or changed
+        finally:
+            store.release_lease(lease, owner)
+    return changed
+
+
+def check_once(
+    config: dict, store: JobStore, url: Optional[str] = None, cache: Optional[HttpCache] = None
+) -> bool:
+    """Perform a single check cycle of a target (default: the first). Returns True if changes were found."""
+    url = url or config["watch_url"]
+    cache = cache if cache is not None else http_cache(config)
+    previous = store.get_fetch_state(url) or {}
+
+    print(f"Fetching {url}...")
+    new_jobs_list = content_hash = None
+    if config["stream_parse"] and config["watch_mode"] == "jobs":
+        # An archived or recorded page must be whole, even if parsing stops early
+        keep_page = bool(config["snapshot_dir"]) or cache.records
+        result, new_jobs_list, content_hash = stream_jobs(
+            url, previous, keep_page, cache, stop_early=config["stream_stop_early"]
+        )
+    else:
+        etag, last_modified = previous.get("etag"), previous.get("last_modified")
+        result = fetch_page(url, etag=etag, last_modified=last_modified, cache=cache)
+
+    if not result:
+        print("ERROR: Failed to fetch URL. Skipping update.")
+        return False
+
+    if result.not_modified:
+        print("Page not modified since last check (HTTP 304)")
+        return False
+
+    html = result.text
+    if config["snapshot_dir"]:
+        from watcher.snapshots import SnapshotStore
+
+        SnapshotStore(config["snapshot_dir"]).add(url, html)
+
+    if content_hash is None:
+        content_hash = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    if content_hash == previous.get("content_hash"):
+        print("Page content unchanged since last check")
+        store.save_fetch_state(url, result.etag, result.last_modified, content_hash)
+        return False
+
+    if config["watch_mode"] == "blocks":
+        changed, complete = check_blocks(config, store, url, html)
+        if complete:
+            store.save_fetch_state(url, result.etag, result.last_modified, content_hash)
+        else:
+            store.clear_fetch_state(url)
+        return changed
+
+    if new_jobs_list is None:
+        from watcher.parse import parse_html
+
+        print("Parsing HTML...")
+        new_jobs_list = parse_html(html)
+    print(f"Found {len(new_jobs_list)} job listings")
+
+    # Past-dated listings would be archived again right after this cycle and
+    # then come back as "new" on the next one, so leave them out entirely.
+    cutoff = retention_cutoff(config)
+    new_jobs_list = [job for job in new_jobs_list if not is_expired(job.date, cutoff)]
+
+    # Convert to dict keyed by job_key
+    new_jobs = {}
+    for job in new_jobs_list:
+        if not job.job_key:
+            job.job_key = job.compute_key()
+        new_jobs[job.job_key] = job
+
+    # Get old jobs
+    old_jobs = store.get_all_jobs(target=url)
+
+    # Compute diff
+    diff = compute_diff(old_jobs, new_jobs)
+
+    # Update store with new jobs FIRST (before filtering notifications)
+    store.upsert_jobs(new_jobs_list, target=url)
+    store.mark_inactive([job.job_key for job in diff.removed])
+
+    # A new key may just be a recent shift re-posted in other words. "group"
+    # records which job it repeats; "suppress" also never sends it, by
+    # recording it as handled on every channel.
+    if config["near_dup_mode"] != "off" and diff.new:
+        from watcher.neardup import find_reposts
+
+        reposts = find_reposts(store, diff.new, config["near_dup_threshold"], config["near_dup_days"])
+        if reposts:
+            print(f"Re-posted jobs: {len(reposts)} ({config['near_dup_mode']})")
+        if config["near_dup_mode"] == "suppress":
+            for key in reposts:
+                for channel in config["notify_channels"]:
+                    store.mark_notified(key, "new", channel)
+
+    # Notify about all currently visible jobs not yet successfully notified.
+    # This covers both genuinely new jobs and jobs that were stored earlier
+    # but whose notification was never sent (e.g. SMTP not configured on
+    # the first run). Using new_jobs_list instead of diff.new ensures that
+    # previously-seen-but-never-notified weekend jobs are not silently lost.
+    # Each channel keeps its own ledger, so a job is only pending on the
+    # channels that have not delivered it yet. Pending jobs are claimed
+    # before sending, so a concurrent run sharing the DB cannot send them too.
+    owner = worker_id()
+    new_to_notify = {}
+    contended = False
+    for channel in config["notify_channels"]:
+        notified = store.notified_keys("new", channel)
+        pending_keys = [j.job_key for j in new_jobs_list if j.job_key not in notified]
+        claimed = store.claim_notifications(pending_keys, "new", channel, owner, config["lease_seconds"])
+        new_to_notify[channel] = [j for j in new_jobs_list if j.job_key in claimed]
+        contended = contended or len(claimed) < len(pending_keys)
+    notified_removed = store.notified_keys("removed")
+    removed_to_notify = [j for j in diff.removed if j.job_key not in notified_removed]
+    notified_changed = store.notified_keys("changed")
+    changed_to_notify = [(old, new) for old, new in diff.changed if new.job_key not in notified_changed]
+    pending_new = {j.job_key for jobs in new_to_notify.values() for j in jobs}
+
+    # Print summary
+    print(f"Changes detected: +{len(diff.new)} new, -{len(diff.removed)} removed, ~{len(diff.changed)} changed")
+    print(
+        f"To notify: +{len(pending_new)} new, "
+        f"-{len(removed_to_notify)} removed, ~{len(changed_to_notify)} changed"
+    )
+
+    # Send notification only for NEW jobs, to all channels at once. Jobs
+    # claimed by another worker are its to send; if it fails they must be
+    # retried from here, so the page does not count as handled yet.
+    complete = not contended
+    if pending_new:
+        from watcher.notify import dispatch, get_notifiers
+
+        # In group mode a digest names the earlier job each re-post repeats
+        # (including re-posts found by an earlier check whose send failed)
+        reposts = {}
+        if config["near_dup_mode"] == "group":
+            stored = store.get_jobs(sorted(pending_new))
+            originals = store.get_jobs(sorted({job.duplicate_of for job in stored.values() if job.duplicate_of}))
+            reposts = {key: originals[job.duplicate_of] for key, job in stored.items() if job.duplicate_of in originals}
+            for job in new_jobs_list:
+                if job.job_key in reposts:
+                    job.duplicate_of = reposts[job.job_key].job_key
+
+        pending = {}
+        for notifier in get_notifiers(config):
+            if new_to_notify[notifier.name]:
+                # Create a diff with only new jobs for the notification
+                new_only_diff = JobDiff()
+                new_only_diff.new = new_to_notify[notifier.name]
+                new_only_diff.reposts = reposts
+                pending[notifier] = new_only_diff
+        def settle(channel: str, delivered: bool) -> None:
+            # A channel still sending after dispatch gave up keeps its claims
+            # until it finishes, so its jobs are neither lost nor sent twice
+            keys = [job.job_key for job in new_to_notify[channel]]
+            if delivered:
+                store.complete_claims(keys, "new", channel, owner)
+            else:
+                store.release_claims(keys, "new", channel, owner)
+
+        print(f"Sending notifications for new jobs via {', '.join(n.name for n in pending)}...")
+        delivery = dispatch(pending, url, on_late=settle)
+        for channel, jobs in new_to_notify.items():
+            keys = [job.job_key for job in jobs]
+            if delivery.get(channel):
+                print(f"Sent via {channel}")
+
+                # Mark as notified
+                store.complete_claims(keys, "new", channel, owner)
+            elif channel in delivery and delivery[channel] is None:
+                complete = False
+            else:
+                if channel in delivery:
+                    print(f"ERROR: Failed to send via {channel}")
+                    complete = False
+                store.release_claims(keys, "new", channel, owner)
+    else:
+        print("No new jobs to notify")
+    # Mark removed/changed as notified without sending anything
+    for job in removed_to_notify:
+        store.mark_notified(job.job_key, "removed")
+    for old, new in changed_to_notify:
+        store.mark_notified(new.job_key, "changed")
+
+    # Only a fully handled page may be skipped next time; after a failed
+    # send the next run must parse again so pending jobs are retried.
+    if complete:
+        store.save_fetch_state(url, result.etag, result.last_modified, content_hash)
+    else:
+        store.clear_fetch_state(url)
+
+    return len(pending_new) > 0 or len(removed_to_notify) > 0 or len(changed_to_notify) > 0
+
+
+def stream_jobs(
+    url: str,
+    previous: dict,
+    keep_page: bool = False,
+    cache: Optional[HttpCache] = None,
+    stop_early: bool = False,
+) -> Tuple[Optional[FetchResult], Optional[List[Job]], Optional[str]]:
+    """
+    Fetch and parse a page in one pass.
+
+    The page is never held whole: rows are parsed as they arrive. With
+    ``stop_early`` the download ends when the job table closes, and the
+    content hash covers only what was read, which is all the job list
+    depends on then.
+
+    Args:
+        url: URL to fetch
+        previous: Fetch state of the last complete check
+        keep_page: Read the whole page and return it as the result's text
+            (parsing still stops where ``stop_early`` says, so the jobs are
+            the same either way)
+        cache: HTTP cache to answer from and record into
+        stop_early: Stop after the first job table (see parse.iter_jobs)
+
+    Returns:
+        (fetch result, jobs, content hash); jobs and hash are None when
+        there was no body, and everything is None if the fetch failed
+    """
+    from watcher.parse import iter_jobs
+
+    digest = hashlib.sha256()
+    kept: List[str] = []
+
+    def read(chunks):
+        for chunk in chunks:
+            digest.update(chunk.encode("utf-8"))
+            if keep_page:
+                kept.append(chunk)
+            yield chunk
+
+    etag, last_modified = previous.get("etag"), previous.get("last_modified")
+    with stream_page(url, etag=etag, last_modified=last_modified, cache=cache) as result:
+        if not result or result.not_modified:
+            return result, None, None
+        print("Parsing HTML as it arrives...")
+        try:
+            reader = read(result.chunks)
+            jobs = list(iter_jobs(reader, stop_early=stop_early))
+            content_hash = digest.hexdigest()
+            if keep_page:
+                for _ in reader:
+                    pass  # rest of the page, for the archive or the cache
+        except ConnectionError as e:
+            print(f"ERROR: {e}")
+            return None, None, None
+    if keep_page:
+        result.text = "".join(kept)
+    return result, jobs, content_hash
+
+
+def check_blocks(config: dict, store: JobStore, url: str, html: str) -> Tuple[bool, bool]:
+    """
+    Report text blocks added to or removed from a page since the last check.
+
+    The first check of a target only stores its blocks. Each channel records
+    the changes it has delivered, and the new blocks are stored once every
+    channel has delivered all of them; after a failed send the next check
+    retries only the changes that channel is missing.
+
+    Returns:
+        (changes found, check complete)
+    """
+    from watcher.blocks import block_hash, diff_blocks, split_blocks
+
+    print("Splitting page into blocks...")
+    blocks = split_blocks(html)
+    diff = diff_blocks(store, url, blocks)
+    if diff is None:
+        print(f"Stored {len(blocks)} blocks as the baseline")
+        store.save_blocks(url, blocks)
+        return False, True
+
+    print(f"Changes detected: +{len(diff.added)} added, -{len(diff.removed)} removed blocks")
+    if not diff.added and not diff.removed:
+        return False, True  # only markup changed
+
+    from watcher.notify import dispatch, get_notifiers
+
+    changes = {
+        change_type: [(block_hash(text), text) for text in texts]
+        for change_type, texts in (("added", diff.added), ("removed", diff.removed))
+    }
+    pending = {}
+    unsent = {}
+    for notifier in get_notifiers(config):
+        delivered = store.notified_blocks(url, notifier.name)
+        channel_diff = BlockDiff()
+        unsent[notifier.name] = []
+        for change_type, items in changes.items():
+            missing = [(block, text) for block, text in items if (change_type, block) not in delivered]
+            getattr(channel_diff, change_type).extend(text for _, text in missing)
+            unsent[notifier.name].extend((change_type, block) for block, _ in missing)
+        if unsent[notifier.name]:
+            pending[notifier] = channel_diff
+
+    def settle(channel: str, delivered: bool) -> None:
+        if delivered:
+            store.mark_blocks_notified(url, channel, unsent[channel])
+
+    delivery = {}
+    if pending:
+        print(f"Sending notifications for changed blocks via {', '.join(n.name for n in pending)}...")
+        delivery = dispatch(pending, url, on_late=settle)
+    for channel, sent in delivery.items():
+        if sent:
+            store.mark_blocks_notified(url, channel, unsent[channel])
+        if sent is not None:
+            print(f"Sent via {channel}" if sent else f"ERROR: Failed to send via {channel}")
+    if not all(delivery.values()):
+        return True, False
+
+    store.save_blocks(url, blocks)
+    return True, True
+
+
+def run_once() -> None:
+    """Run a single check cycle with configuration from the environment."""
+    load_env()
+    config = get_config()
+    store = JobStore(config["state_db_path"])
+    check_all(config, store)
+    apply_retention(config, store)
+    store._close_connection()
@@ -0,0 +1,253 @@
+"""
+Content-addressed archive of raw page snapshots.
+
+Layout (one directory per watched URL):
+
+    <root>/<target_id>/target.json   URL of the target
+    <root>/<target_id>/pack          append-only compressed objects
+    <root>/<target_id>/index.jsonl   one line per capture
+
+Objects are keyed by the SHA-256 of the page, so a page that did not change
+is stored once and later captures only add an index line. A changed page is
+stored as a line delta against the previous object of the same target, with
+a full copy every ``keyframe_interval`` objects to keep read chains short.
+Objects are compressed with zstd when the optional ``zstandard`` package is
+installed and with zlib otherwise. Reads go through a memory-mapped pack.
+"""
+
+import difflib
+import hashlib
+import json
+import mmap
+import os
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+KEYFRAME_INTERVAL = 32
+
+
+@dataclass
+class SnapshotEntry:
+    """One capture of a page, as recorded in the target's index."""
+
+    taken_at: str
+    content_hash: str
+    offset: int
+    length: int
+    codec: str
+    base: Optional[str] = None  # hash of the delta base, None for a full copy
+    depth: int = 0  # delta chain length down to the nearest full copy
+
+
+def target_id(url: str) -> str:
+    """Stable directory name for a watched URL."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+
+
+def _compress(data: bytes) -> tuple:
+    try:
+        import zstandard
+    except ImportError:
+        return "zlib", zlib.compress(data, 9)
+    return "zstd", zstandard.ZstdCompressor(level=19).compress(data)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown snapshot codec: {codec}")
+
+
+def make_delta(base: str, text: str) -> list:
+    """
+    Encode ``text`` as line operations against ``base``.
+
+    Returns a list where ``[start, end]`` copies base lines start:end and a
+    string inserts literal text.
+    """
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    ops: list = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(lines[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, ops: list) -> str:
+    """Rebuild a page from its base and the operations from make_delta."""
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+class SnapshotStore:
+    """Append-only, deduplicated and delta-compressed page archive."""
+
+    def __init__(self, root: str, keyframe_interval: int = KEYFRAME_INTERVAL):
+        """Initialize store rooted at a directory (created on first write)."""
+        self.root = root
+        self.keyframe_interval = keyframe_interval
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._cache: Dict[str, tuple] = {}  # (hash, page) last rebuilt per target
+
+    def _dir(self, url: str) -> str:
+        return os.path.join(self.root, target_id(url))
+
+    def targets(self) -> Dict[str, str]:
+        """Return archived targets as {target_id: url}."""
+        result = {}
+        if not os.path.isdir(self.root):
+            return result
+        for name in sorted(os.listdir(self.root)):
+            meta_path = os.path.join(self.root, name, "target.json")
+            if os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    result[name] = json.load(f)["url"]
+        return result
+
+    def history(self, url: str) -> List[SnapshotEntry]:
+        """Return every capture of a URL in the order it was taken."""
+        index_path = os.path.join(self._dir(url), "index.jsonl")
+        if not os.path.exists(index_path):
+            return []
+        with open(index_path, "r", encoding="utf-8") as f:
+            return [SnapshotEntry(**json.loads(line)) for line in f if line.strip()]
+
+    def add(self, url: str, html: str, taken_at: Optional[datetime] = None) -> SnapshotEntry:
+        """
+        Archive a capture of a page.
+
+        Args:
+            url: URL the page was fetched from
+            html: Page content
+            taken_at: Capture time (defaults to now, UTC)
+
+        Returns:
+            Index entry of the capture
+        """
+        directory = self._dir(url)
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, "target.json")
+        if not os.path.exists(meta_path):
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"url": url}, f)
+
+        taken = (taken_at or datetime.utcnow()).isoformat()
+        data = html.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        history = self.history(url)
+        objects = {entry.content_hash: entry for entry in history}
+
+        if content_hash in objects:
+            stored = objects[content_hash]
+            entry = SnapshotEntry(**{**asdict(stored), "taken_at": taken})
+        else:
+            previous = history[-1] if history else None
+            base, depth = None, 0
+            if previous and previous.depth + 1 < self.keyframe_interval:
+                ops = make_delta(self.read(url, previous.content_hash), html)
+                payload = json.dumps(ops, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                if len(payload) < len(data):
+                    base, depth, data = previous.content_hash, previous.depth + 1, payload
+
+            codec, blob = _compress(data)
+            self._close_map(directory)
+            with open(os.path.join(directory, "pack"), "ab") as f:
+                offset = f.tell()
+                f.write(blob)
+            entry = SnapshotEntry(
+                taken_at=taken,
+                content_hash=content_hash,
+                offset=offset,
+                length=len(blob),
+                codec=codec,
+                base=base,
+                depth=depth,
+            )
+
+        with open(os.path.join(directory, "index.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(entry), separators=(",", ":")) + "\n")
+        self._cache[directory] = (content_hash, html)
+        return entry
+
+    def read(self, url: str, content_hash: str) -> str:
+        """
+        Return the archived page with the given content hash.
+
+        Raises:
+            KeyError: If the page was never archived for this URL
+        """
+        objects = {entry.content_hash: entry for entry in self.history(url)}
+        return self.read_with_index(url, objects, content_hash)
+
+    def iter_pages(self, url: str) -> Iterator[Tuple[SnapshotEntry, str]]:
+        """Yield (entry, page) for every capture of a URL in capture order."""
+        history = self.history(url)
+        objects = {entry.content_hash: entry for entry in history}
+        for entry in history:
+            yield entry, self.read_with_index(url, objects, entry.content_hash)
+
+    def read_with_index(self, url: str, objects: Dict[str, SnapshotEntry], content_hash: str) -> str:
+        """
+        Like read, with the URL's history already indexed by content hash.
+
+        Callers reading many pages of one URL build the index once.
+
+        Raises:
+            KeyError: If the page is not in ``objects``
+        """
+        directory = self._dir(url)
+        cached_hash, cached_text = self._cache.get(directory, (None, ""))
+
+        # Walk back to the nearest full copy (or the last page rebuilt), then
+        # replay the deltas forward
+        chain = []
+        entry = objects[content_hash]
+        while entry.content_hash != cached_hash:
+            chain.append(entry)
+            if entry.base is None:
+                break
+            entry = objects[entry.base]
+        text = cached_text if entry.content_hash == cached_hash else ""
+
+        pack = self._map(directory)
+        for entry in reversed(chain):
+            raw = _decompress(entry.codec, pack[entry.offset:entry.offset + entry.length])
+            if entry.base is None:
+                text = raw.decode("utf-8")
+            else:
+                text = apply_delta(text, json.loads(raw))
+
+        self._cache[directory] = (content_hash, text)
+        return text
+
+    def _map(self, directory: str) -> mmap.mmap:
+        if directory not in self._maps:
+            with open(os.path.join(directory, "pack"), "rb") as f:
+                self._maps[directory] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[directory]
+
+    def _close_map(self, directory: str) -> None:
+        pack = self._maps.pop(directory, None)
+        if pack is not None:
+            pack.close()
+
+    def close(self) -> None:
+        """Release memory maps."""
+        for directory in list(self._maps):
+            self._close_map(directory)
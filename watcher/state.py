@@ -0,0 +1,103 @@
+"""Compact, compressed snapshots of the live watcher state."""
+
+import gzip
+import json
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional
+
+from watcher.store import (
+    BLOCK_COLUMNS,
+    BLOCK_NOTIFICATION_COLUMNS,
+    FETCH_STATE_COLUMNS,
+    LIVE_JOB_COLUMNS,
+    NOTIFICATION_COLUMNS,
+    ROLLUP_DAILY_COLUMNS,
+    ROLLUP_WAGES_COLUMNS,
+    JobStore,
+)
+
+SNAPSHOT_FORMAT = "watcher-state"
+SNAPSHOT_VERSION = 1
+
+_COLUMNS = {
+    "jobs": LIVE_JOB_COLUMNS,
+    "notifications": NOTIFICATION_COLUMNS,
+    "fetch_state": FETCH_STATE_COLUMNS,
+    "blocks": BLOCK_COLUMNS,
+    "block_notifications": BLOCK_NOTIFICATION_COLUMNS,
+    "rollup_daily": ROLLUP_DAILY_COLUMNS,
+    "rollup_wages": ROLLUP_WAGES_COLUMNS,
+}
+
+
+def export_state(store: JobStore, path: Path, cutoff: Optional[date] = None) -> Dict[str, int]:
+    """
+    Write the live state of a store to a gzip-compressed JSON snapshot.
+
+    Only unexpired jobs, their notification ledger (one row per job and change
+    type), the fetch validators, the text blocks of block-mode targets (and
+    which of their changes each channel has delivered) and the
+    statistics rollups are written; job history is left behind.
+
+    Args:
+        store: Store to export
+        path: Snapshot file to write
+        cutoff: Jobs dated before this day are expired (defaults to today)
+
+    Returns:
+        Number of rows written per table
+    """
+    state = store.dump_live_state(cutoff or date.today())
+    payload = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "tables": {
+            name: {"columns": list(columns), "rows": state[name]}
+            for name, columns in _COLUMNS.items()
+        },
+    }
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+    # Write next to the target and rename, so a crash never leaves half a snapshot
+    tmp_path = Path(f"{path}.tmp")
+    with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+        f.write(data)
+    tmp_path.replace(path)
+
+    return {name: len(rows) for name, rows in state.items()}
+
+
+def import_state(store: JobStore, path: Path) -> Dict[str, int]:
+    """
+    Replace the store's jobs, ledger and fetch state with a snapshot.
+
+    Args:
+        store: Store to load into
+        path: Snapshot file written by export_state
+
+    Returns:
+        Number of rows loaded per table
+
+    Raises:
+        ValueError: If the file is not a snapshot this version understands
+    """
+    with gzip.open(path, "rb") as f:
+        payload = json.loads(f.read().decode("utf-8"))
+
+    if payload.get("format") != SNAPSHOT_FORMAT or payload.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} watcher state snapshot")
+
+    # Columns are matched by name, so snapshots from an older schema load
+    # with the newer columns left empty
+    state = {}
+    for name, columns in _COLUMNS.items():
+        table = payload["tables"].get(name, {"columns": [], "rows": []})
+        positions = [table["columns"].index(c) if c in table["columns"] else None for c in columns]
+        state[name] = [
+            tuple(row[i] if i is not None else None for i in positions)
+            for row in table["rows"]
+        ]
+
+    store.bulk_load(state)
+    return {name: len(rows) for name, rows in state.items()}
@@ -1,10 +1,78 @@
 """SQLite storage for job state."""
 
 import sqlite3
-from datetime import datetime
-from typing import Dict, List
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
-from watcher.models import Job
+from watcher.models import Job, parse_hours, parse_job_date, parse_wage
+
+# Column order used by dump_live_state / bulk_load (and state snapshots)
+JOB_COLUMNS = (
+    "job_key", "title", "city", "date", "day_of_week", "time_range",
+    "duration_hours", "wage_czk_per_h", "raw_text", "first_seen", "last_seen",
+)
+NOTIFICATION_COLUMNS = ("job_key", "change_type", "notified_at", "channel")
+FETCH_STATE_COLUMNS = ("url", "etag", "last_modified", "content_hash", "checked_at")
+# Text blocks of pages watched in block mode, by target
+BLOCK_COLUMNS = ("target", "block_hash", "position", "text", "first_seen")
+# Block changes ("added"/"removed") already delivered on a channel, until the blocks are stored
+BLOCK_NOTIFICATION_COLUMNS = ("target", "block_hash", "change_type", "channel", "notified_at")
+# Live jobs also carry whether they are still listed, which target page
+# lists them and which earlier job they re-post; archived jobs never are listed
+LIVE_JOB_COLUMNS = JOB_COLUMNS + ("active", "target", "duplicate_of")
+
+# Per listing day and city: jobs ever posted, jobs still listed, hours
+# posted and wage totals, plus a wage histogram for medians
+ROLLUP_DAILY_COLUMNS = ("day", "city", "posted", "active", "hours", "wage_total", "wage_jobs")
+ROLLUP_WAGES_COLUMNS = ("day", "city", "wage_czk", "jobs")
+
+# Queryable copies of the free-text date, wage and duration; always derived
+# from the text columns on write, so snapshots do not carry them
+TYPED_COLUMNS = ("date_iso", "wage_czk", "hours")
+
+# Columns returned by query_jobs
+QUERY_COLUMNS = (
+    "job_key", "title", "city", "date_iso", "day_of_week", "time_range",
+    "hours", "wage_czk", "first_seen", "last_seen",
+)
+
+
+def is_expired(date_text: Optional[str], cutoff: date) -> bool:
+    """A job is expired once its listing date is before the cutoff (undated jobs never expire)."""
+    job_date = parse_job_date(date_text or "")
+    return job_date is not None and job_date < cutoff
+
+
+def typed_values(date_text: Optional[str], duration_text: Optional[str], wage_text: Optional[str]) -> tuple:
+    """Return (date_iso, wage_czk, hours) for the free-text columns of a job."""
+    job_date = parse_job_date(date_text or "")
+    return (
+        job_date.isoformat() if job_date else None,
+        parse_wage(wage_text or ""),
+        parse_hours(duration_text or ""),
+    )
+
+
+def histogram_median(histogram: List[Tuple[int, int]]) -> Optional[float]:
+    """Median of (value, count) pairs sorted by value (None if empty)."""
+    total = sum(count for _, count in histogram)
+    if not total:
+        return None
+    lower, upper = (total - 1) // 2, total // 2
+    seen = 0
+    low_value = None
+    for value, count in histogram:
+        if low_value is None and seen + count > lower:
+            low_value = value
+        if seen + count > upper:
+            return (low_value + value) / 2
+        seen += count
+    return None
+
+
+def fts_query(text: str) -> str:
+    """Turn search words into an FTS5 query matching listings with all of them as word prefixes."""
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in text.split())
 
 
 class JobStore:
@@ -22,10 +90,27 @@ class JobStore:
         conn.commit()
         conn.close()
 
+    def _begin_write(self) -> sqlite3.Connection:
+        """
+        Open a connection that holds the write lock from the start.
+
+        Several processes may share the DB. A transaction that reads before it
+        writes can fail at once with "database is locked" if another writer
+        got in between; taking the lock up front (BEGIN IMMEDIATE) makes it
+        wait its turn instead, and makes read-then-write steps atomic.
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
     def _init_db(self):
         """Initialize database schema."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
         cursor = conn.cursor()
+        # Only takes effect on a new, empty DB; existing ones are converted by compact()
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # One migration at a time when several workers start together
+        cursor.execute("BEGIN IMMEDIATE")
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS jobs (
                 job_key TEXT PRIMARY KEY,
@@ -38,77 +123,312 @@ class JobStore:
                 wage_czk_per_h TEXT,
                 raw_text TEXT NOT NULL,
                 first_seen TIMESTAMP NOT NULL,
-                last_seen TIMESTAMP NOT NULL
+                last_seen TIMESTAMP NOT NULL,
+                date_iso TEXT,
+                wage_czk INTEGER,
+                hours REAL,
+                active INTEGER NOT NULL DEFAULT 1,
+                target TEXT NOT NULL DEFAULT '',
+                minhash BLOB,
+                duplicate_of TEXT
             )
         """)
         try:
             cursor.execute("ALTER TABLE jobs ADD COLUMN day_of_week TEXT")
         except sqlite3.OperationalError:
             pass  # column already exists (new DB or migrated)
+        try:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN active INTEGER NOT NULL DEFAULT 1")
+        except sqlite3.OperationalError:
+            pass  # column already exists (new DB or migrated)
+        try:
+            # Jobs stored before targets existed are taken over by the first target that lists them
+            cursor.execute("ALTER TABLE jobs ADD COLUMN target TEXT NOT NULL DEFAULT ''")
+        except sqlite3.OperationalError:
+            pass  # column already exists (new DB or migrated)
+        for column in ("minhash BLOB", "duplicate_of TEXT"):
+            try:
+                # Signatures are filled in on demand by near-duplicate detection
+                cursor.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                pass  # column already exists (new DB or migrated)
+        self._add_typed_columns(conn, "main", "jobs")
+        self.full_text = self._create_search_indexes(conn, "main", "jobs")
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS notifications (
                 notification_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 job_key TEXT NOT NULL,
                 change_type TEXT NOT NULL,
                 notified_at TIMESTAMP NOT NULL,
+                channel TEXT NOT NULL DEFAULT 'email',
                 FOREIGN KEY (job_key) REFERENCES jobs(job_key)
             )
         """)
+        try:
+            # Everything recorded before channels existed went out by email
+            cursor.execute("ALTER TABLE notifications ADD COLUMN channel TEXT NOT NULL DEFAULT 'email'")
+        except sqlite3.OperationalError:
+            pass  # column already exists (new DB or migrated)
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_notifications_job_key 
             ON notifications(job_key)
         """)
+        if not cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'idx_notifications_unique'"
+        ).fetchone():
+            # Concurrent runs before claims existed could record a change twice
+            cursor.execute("""
+                DELETE FROM notifications WHERE notification_id NOT IN (
+                    SELECT MIN(notification_id) FROM notifications
+                    GROUP BY job_key, change_type, channel
+                )
+            """)
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_unique
+                ON notifications(job_key, change_type, channel)
+            """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notification_claims (
+                job_key TEXT NOT NULL,
+                change_type TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                claimed_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (job_key, change_type, channel)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at TIMESTAMP NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                target TEXT NOT NULL,
+                block_hash TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                first_seen TIMESTAMP NOT NULL,
+                PRIMARY KEY (target, block_hash)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS block_notifications (
+                target TEXT NOT NULL,
+                block_hash TEXT NOT NULL,
+                change_type TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                notified_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (target, block_hash, change_type, channel)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fetch_state (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                checked_at TIMESTAMP NOT NULL
+            )
+        """)
+        rollups_exist = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'rollup_daily'"
+        ).fetchone()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rollup_daily (
+                day TEXT NOT NULL,
+                city TEXT NOT NULL,
+                posted INTEGER NOT NULL,
+                active INTEGER NOT NULL,
+                hours REAL NOT NULL,
+                wage_total REAL NOT NULL,
+                wage_jobs INTEGER NOT NULL,
+                PRIMARY KEY (day, city)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rollup_wages (
+                day TEXT NOT NULL,
+                city TEXT NOT NULL,
+                wage_czk INTEGER NOT NULL,
+                jobs INTEGER NOT NULL,
+                PRIMARY KEY (day, city, wage_czk)
+            ) WITHOUT ROWID
+        """)
+        if not rollups_exist:
+            self._rebuild_rollups(conn)
         conn.commit()
         conn.close()
 
-    def upsert_jobs(self, jobs: List[Job]) -> None:
-        """Insert or update jobs in the database."""
-        conn = sqlite3.connect(self.db_path)
+    def _roll_up(self, conn: sqlite3.Connection, where: str, params: tuple = (), source: str = "jobs") -> None:
+        """Add newly stored jobs matching ``where`` to the rollups."""
+        conn.execute(f"""
+            INSERT INTO rollup_daily ({', '.join(ROLLUP_DAILY_COLUMNS)})
+            SELECT IFNULL(date_iso, ''), city, COUNT(*), TOTAL(active), TOTAL(hours), TOTAL(wage_czk), COUNT(wage_czk)
+            FROM {source} WHERE {where} GROUP BY 1, 2
+            ON CONFLICT(day, city) DO UPDATE SET
+                posted = posted + excluded.posted,
+                active = active + excluded.active,
+                hours = hours + excluded.hours,
+                wage_total = wage_total + excluded.wage_total,
+                wage_jobs = wage_jobs + excluded.wage_jobs
+        """, params)
+        conn.execute(f"""
+            INSERT INTO rollup_wages ({', '.join(ROLLUP_WAGES_COLUMNS)})
+            SELECT IFNULL(date_iso, ''), city, wage_czk, COUNT(*)
+            FROM {source} WHERE wage_czk IS NOT NULL AND ({where}) GROUP BY 1, 2, 3
+            ON CONFLICT(day, city, wage_czk) DO UPDATE SET jobs = jobs + excluded.jobs
+        """, params)
+
+    def _count_active(self, conn: sqlite3.Connection, where: str, params: tuple, delta: int) -> None:
+        """Add ``delta`` to the active count of each job matching ``where``."""
+        conn.execute(f"""
+            INSERT INTO rollup_daily ({', '.join(ROLLUP_DAILY_COLUMNS)})
+            SELECT IFNULL(date_iso, ''), city, 0, {int(delta)} * COUNT(*), 0, 0, 0
+            FROM jobs WHERE {where} GROUP BY 1, 2
+            ON CONFLICT(day, city) DO UPDATE SET active = active + excluded.active
+        """, params)
+
+    def _rebuild_rollups(self, conn: sqlite3.Connection) -> None:
+        """Recompute the rollups from the jobs table (and archived jobs kept in this DB)."""
+        conn.execute("DELETE FROM rollup_daily")
+        conn.execute("DELETE FROM rollup_wages")
+        self._roll_up(conn, "1")
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs_archive'").fetchone():
+            self._add_typed_columns(conn, "main", "jobs_archive")
+            archived = "(SELECT date_iso, city, 0 AS active, hours, wage_czk FROM jobs_archive)"
+            self._roll_up(conn, "1", source=archived)
+
+    def _add_typed_columns(self, conn: sqlite3.Connection, schema: str, table: str) -> None:
+        """Add the typed columns to an older table and fill them from the text columns."""
+        existing = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")}
+        missing = [column for column in TYPED_COLUMNS if column not in existing]
+        if not missing:
+            return
+        types = {"date_iso": "TEXT", "wage_czk": "INTEGER", "hours": "REAL"}
+        for column in missing:
+            conn.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {column} {types[column]}")
+        rows = conn.execute(f"SELECT date, duration_hours, wage_czk_per_h, job_key FROM {schema}.{table}")
+        conn.executemany(
+            f"UPDATE {schema}.{table} SET date_iso = ?, wage_czk = ?, hours = ? WHERE job_key = ?",
+            [typed_values(job_date, duration, wage) + (job_key,) for job_date, duration, wage, job_key in rows],
+        )
+
+    def _create_search_indexes(self, conn: sqlite3.Connection, schema: str, table: str) -> bool:
+        """
+        Create the query indexes and the full-text index over raw_text for a jobs table.
+
+        The FTS5 table stores no text of its own (content= the jobs table).
+        It is kept in sync by the write methods with set-based statements in
+        rowid order rather than per-row triggers, which are several times
+        slower for FTS5. If this SQLite build lacks FTS5 it is skipped and
+        text search falls back to LIKE.
+
+        Returns:
+            True if the full-text index exists
+        """
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_date_iso ON {table}(date_iso)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_city_date ON {table}(city, date_iso)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_wage ON {table}(wage_czk)")
+
+        fts = f"{table}_fts"
+        exists = conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE name = ?", (fts,)
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE {schema}.{fts} USING fts5(
+                    raw_text, content='{table}', content_rowid='rowid',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return False  # no FTS5 in this SQLite build
+        conn.execute(f"INSERT INTO {schema}.{fts}({fts}) VALUES ('rebuild')")
+        return True
+
+    def _index_text(self, conn: sqlite3.Connection, schema: str, table: str, where: str, params: tuple = ()) -> None:
+        """Add the raw_text of the rows matching ``where`` to the table's full-text index."""
+        if self.full_text:
+            conn.execute(f"""
+                INSERT INTO {schema}.{table}_fts(rowid, raw_text)
+                SELECT rowid, raw_text FROM {schema}.{table} WHERE {where} ORDER BY rowid
+            """, params)
+
+    def _unindex_text(self, conn: sqlite3.Connection, schema: str, table: str, where: str, params: tuple = ()) -> None:
+        """Drop the rows matching ``where`` from the full-text index; call before changing them."""
+        if self.full_text:
+            conn.execute(f"""
+                INSERT INTO {schema}.{table}_fts({table}_fts, rowid, raw_text)
+                SELECT 'delete', rowid, raw_text FROM {schema}.{table} WHERE {where}
+            """, params)
+
+    def upsert_jobs(self, jobs: List[Job], target: str = "") -> None:
+        """Insert or update jobs in the database, as listed by a target page."""
+        conn = self._begin_write()
         cursor = conn.cursor()
         now = datetime.utcnow()
+        # New rows get rowids above this and are indexed and rolled up in one go
+        last_rowid = cursor.execute("SELECT IFNULL(MAX(rowid), 0) FROM jobs").fetchone()[0]
 
         for job in jobs:
             if not job.job_key:
                 job.job_key = job.compute_key()
 
             # Check if job exists
-            cursor.execute("SELECT first_seen FROM jobs WHERE job_key = ?", (job.job_key,))
+            cursor.execute("SELECT raw_text, active FROM jobs WHERE job_key = ?", (job.job_key,))
             row = cursor.fetchone()
 
             if row:
-                # Update existing job
+                text_changed = row[0] != job.raw_text
+                if text_changed:
+                    self._unindex_text(conn, "main", "jobs", "job_key = ?", (job.job_key,))
+                if not row[1]:
+                    # Listed again after it disappeared
+                    self._count_active(conn, "job_key = ?", (job.job_key,), 1)
+                # Update existing job. City, date, wage and shift are part of
+                # the key, so the typed columns (and rollups) are left alone.
                 cursor.execute("""
                     UPDATE jobs SET
                         title = ?,
-                        city = ?,
                         date = ?,
                         day_of_week = ?,
                         time_range = ?,
                         duration_hours = ?,
                         wage_czk_per_h = ?,
+                        minhash = CASE WHEN raw_text = ? THEN minhash END,
                         raw_text = ?,
-                        last_seen = ?
+                        last_seen = ?,
+                        active = 1,
+                        target = ?
                     WHERE job_key = ?
                 """, (
                     job.title,
-                    job.city,
                     job.date,
                     job.day_of_week or "",
                     job.time_range,
                     job.duration_hours,
                     job.wage_czk_per_h,
                     job.raw_text,
+                    job.raw_text,
                     now,
+                    target,
                     job.job_key,
                 ))
+                if text_changed:
+                    self._index_text(conn, "main", "jobs", "job_key = ?", (job.job_key,))
             else:
                 # Insert new job
                 cursor.execute("""
                     INSERT INTO jobs (
                         job_key, title, city, date, day_of_week, time_range,
                         duration_hours, wage_czk_per_h, raw_text,
-                        first_seen, last_seen
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        first_seen, last_seen, target, date_iso, wage_czk, hours
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     job.job_key,
                     job.title,
@@ -121,73 +441,797 @@ class JobStore:
                     job.raw_text,
                     now,
                     now,
+                    target,
+                    *typed_values(job.date, job.duration_hours, job.wage_czk_per_h),
                 ))
 
+        self._index_text(conn, "main", "jobs", "rowid > ?", (last_rowid,))
+        self._roll_up(conn, "rowid > ?", (last_rowid,))
         conn.commit()
         conn.close()
 
-    def get_all_jobs(self) -> Dict[str, Job]:
-        """Retrieve all jobs from database."""
+    def mark_inactive(self, job_keys: List[str]) -> int:
+        """
+        Record that jobs are no longer listed.
+
+        Args:
+            job_keys: Keys of jobs that disappeared (already inactive ones are skipped)
+
+        Returns:
+            Number of jobs newly marked inactive
+        """
+        conn = self._begin_write()
+        with conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS gone_keys (job_key TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.gone_keys")
+            conn.executemany("INSERT OR IGNORE INTO temp.gone_keys VALUES (?)", [(key,) for key in job_keys])
+            gone = "active = 1 AND job_key IN (SELECT job_key FROM temp.gone_keys)"
+            self._count_active(conn, gone, (), -1)
+            count = conn.execute(f"UPDATE jobs SET active = 0 WHERE {gone}").rowcount
+        conn.close()
+        return count
+
+    def get_all_jobs(self, active_only: bool = False, target: Optional[str] = None) -> Dict[str, Job]:
+        """
+        Retrieve jobs from database.
+
+        Args:
+            active_only: Only jobs that are still listed
+            target: Only jobs of this target page (plus those stored before
+                targets were recorded); all targets if None
+        """
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM jobs")
+        conditions, params = [], []
+        if active_only:
+            conditions.append("active = 1")
+        if target is not None:
+            conditions.append("target IN (?, '')")
+            params.append(target)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor.execute(f"SELECT * FROM jobs{where}", params)
         rows = cursor.fetchall()
 
         jobs = {}
         for row in rows:
-            # Parse timestamps from SQLite (stored as ISO format strings)
-            first_seen = None
-            last_seen = None
-            if row["first_seen"]:
-                try:
-                    first_seen = datetime.fromisoformat(row["first_seen"].replace("Z", "+00:00"))
-                except (ValueError, AttributeError):
-                    pass
-            if row["last_seen"]:
-                try:
-                    last_seen = datetime.fromisoformat(row["last_seen"].replace("Z", "+00:00"))
-                except (ValueError, AttributeError):
-                    pass
-
-            job = Job(
-                job_key=row["job_key"],
-                title=row["title"],
-                city=row["city"],
-                date=row["date"] or "",
-                day_of_week=row["day_of_week"] if row["day_of_week"] else "",
-                time_range=row["time_range"] or "",
-                duration_hours=row["duration_hours"] or "",
-                wage_czk_per_h=row["wage_czk_per_h"] or "",
-                raw_text=row["raw_text"],
-                first_seen=first_seen,
-                last_seen=last_seen,
-            )
+            job = self._row_to_job(row)
             jobs[job.job_key] = job
 
         conn.close()
         return jobs
 
-    def mark_notified(self, job_key: str, change_type: str) -> None:
-        """Mark that a notification was sent for a job change."""
+    def get_jobs(self, job_keys: List[str]) -> Dict[str, Job]:
+        """Retrieve the live jobs with the given keys (missing keys are left out)."""
+        if not job_keys:
+            return {}
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(f"SELECT * FROM jobs WHERE {self._stage_keys(conn, job_keys)}").fetchall()
+        conn.close()
+        return {row["job_key"]: self._row_to_job(row) for row in rows}
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Job:
+        # Parse timestamps from SQLite (stored as ISO format strings)
+        first_seen = None
+        last_seen = None
+        if row["first_seen"]:
+            try:
+                first_seen = datetime.fromisoformat(row["first_seen"].replace("Z", "+00:00"))
+            except (ValueError, AttributeError):
+                pass
+        if row["last_seen"]:
+            try:
+                last_seen = datetime.fromisoformat(row["last_seen"].replace("Z", "+00:00"))
+            except (ValueError, AttributeError):
+                pass
+
+        return Job(
+            job_key=row["job_key"],
+            title=row["title"],
+            city=row["city"],
+            date=row["date"] or "",
+            day_of_week=row["day_of_week"] if row["day_of_week"] else "",
+            time_range=row["time_range"] or "",
+            duration_hours=row["duration_hours"] or "",
+            wage_czk_per_h=row["wage_czk_per_h"] or "",
+            raw_text=row["raw_text"],
+            first_seen=first_seen,
+            last_seen=last_seen,
+            duplicate_of=row["duplicate_of"],
+        )
+
+    def mark_notified(self, job_key: str, change_type: str, channel: str = "email") -> None:
+        """Mark that a notification was sent for a job change on a channel."""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO notifications (job_key, change_type, notified_at)
-            VALUES (?, ?, ?)
-        """, (job_key, change_type, datetime.utcnow()))
+            INSERT OR IGNORE INTO notifications (job_key, change_type, notified_at, channel)
+            VALUES (?, ?, ?, ?)
+        """, (job_key, change_type, datetime.utcnow(), channel))
         conn.commit()
         conn.close()
 
-    def was_notified(self, job_key: str, change_type: str) -> bool:
-        """Check if a notification was already sent for this change."""
+    def was_notified(self, job_key: str, change_type: str, channel: str = "email") -> bool:
+        """Check if a notification was already sent for this change on a channel."""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute("""
             SELECT COUNT(*) FROM notifications
-            WHERE job_key = ? AND change_type = ?
-        """, (job_key, change_type))
+            WHERE job_key = ? AND change_type = ? AND channel = ?
+        """, (job_key, change_type, channel))
         count = cursor.fetchone()[0]
         conn.close()
         return count > 0
+
+    def notified_keys(self, change_type: str, channel: str = "email") -> set:
+        """Return the keys of all jobs already notified for a change type on a channel."""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT DISTINCT job_key FROM notifications WHERE change_type = ? AND channel = ?",
+            (change_type, channel),
+        ).fetchall()
+        conn.close()
+        return {row[0] for row in rows}
+
+    def fingerprints(self, since: datetime) -> List[Tuple[str, Optional[str], str, Optional[str], Optional[bytes]]]:
+        """
+        Return near-duplicate fingerprints of recently active jobs.
+
+        Args:
+            since: Jobs still listed or last seen at or after this time are returned
+
+        Returns:
+            (job_key, date_iso, time_range, raw_text, minhash) rows; raw_text is
+            only returned for jobs that have no signature yet
+        """
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("""
+            SELECT job_key, date_iso, time_range, CASE WHEN minhash IS NULL THEN raw_text END, minhash
+            FROM jobs WHERE active = 1 OR last_seen >= ?
+        """, (since,)).fetchall()
+        conn.close()
+        return rows
+
+    def save_fingerprints(self, signatures: Dict[str, bytes]) -> None:
+        """Store near-duplicate signatures by job key."""
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany(
+                "UPDATE jobs SET minhash = ? WHERE job_key = ?",
+                [(sig, key) for key, sig in signatures.items()],
+            )
+        conn.close()
+
+    def mark_duplicates(self, duplicates: Dict[str, str]) -> None:
+        """Record that jobs re-post earlier ones (job_key -> earlier job_key)."""
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany(
+                "UPDATE jobs SET duplicate_of = ? WHERE job_key = ?",
+                [(original, key) for key, original in duplicates.items()],
+            )
+        conn.close()
+
+    def _stage_keys(self, conn: sqlite3.Connection, job_keys: List[str]) -> str:
+        """Load keys into a temp table and return a filter matching them."""
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS staged_keys (job_key TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.staged_keys")
+        conn.executemany("INSERT OR IGNORE INTO temp.staged_keys VALUES (?)", [(key,) for key in job_keys])
+        return "job_key IN (SELECT job_key FROM temp.staged_keys)"
+
+    def claim_notifications(
+        self, job_keys: List[str], change_type: str, channel: str, owner: str, seconds: float
+    ) -> set:
+        """
+        Atomically claim the right to send notifications, before sending them.
+
+        A key is claimed only if it has not been notified on the channel yet
+        and no other owner holds a live claim on it. Claims older than
+        ``seconds`` are taken over, so a worker that died mid-send does not
+        block the job forever.
+
+        Args:
+            job_keys: Jobs that look pending to the caller
+            change_type: Change type to claim
+            channel: Channel the caller is about to send on
+            owner: Identifier of the calling worker
+            seconds: Age after which another owner's claim is stale
+
+        Returns:
+            Keys now claimed by ``owner`` (including its own earlier claims)
+        """
+        now = datetime.utcnow()
+        # The write lock is taken up front, so check-and-claim is a single step
+        conn = self._begin_write()
+        try:
+            keys = self._stage_keys(conn, job_keys)
+            conn.execute(f"""
+                DELETE FROM notification_claims
+                WHERE change_type = ? AND channel = ? AND claimed_at < ? AND {keys}
+            """, (change_type, channel, now - timedelta(seconds=seconds)))
+            conn.execute("""
+                INSERT OR IGNORE INTO notification_claims (job_key, change_type, channel, owner, claimed_at)
+                SELECT s.job_key, ?, ?, ?, ? FROM temp.staged_keys s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM notifications n
+                    WHERE n.job_key = s.job_key AND n.change_type = ? AND n.channel = ?
+                )
+            """, (change_type, channel, owner, now, change_type, channel))
+            rows = conn.execute(f"""
+                SELECT job_key FROM notification_claims
+                WHERE change_type = ? AND channel = ? AND owner = ? AND {keys}
+            """, (change_type, channel, owner)).fetchall()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return {row[0] for row in rows}
+
+    def complete_claims(self, job_keys: List[str], change_type: str, channel: str, owner: str) -> None:
+        """Record claimed notifications as sent and drop the claims, in one transaction."""
+        conn = self._begin_write()
+        with conn:
+            keys = self._stage_keys(conn, job_keys)
+            conn.execute("""
+                INSERT OR IGNORE INTO notifications (job_key, change_type, notified_at, channel)
+                SELECT job_key, ?, ?, ? FROM temp.staged_keys
+            """, (change_type, datetime.utcnow(), channel))
+            conn.execute(f"""
+                DELETE FROM notification_claims
+                WHERE change_type = ? AND channel = ? AND owner = ? AND {keys}
+            """, (change_type, channel, owner))
+        conn.close()
+
+    def release_claims(self, job_keys: List[str], change_type: str, channel: str, owner: str) -> None:
+        """Give up claims after a failed send, so the jobs can be retried."""
+        conn = self._begin_write()
+        with conn:
+            keys = self._stage_keys(conn, job_keys)
+            conn.execute(f"""
+                DELETE FROM notification_claims
+                WHERE change_type = ? AND channel = ? AND owner = ? AND {keys}
+            """, (change_type, channel, owner))
+        conn.close()
+
+    def acquire_lease(self, name: str, owner: str, seconds: float) -> bool:
+        """
+        Take or renew a named lease (e.g. one per target) for a while.
+
+        Succeeds if the lease is free, expired or already held by ``owner``;
+        the check and the write are a single statement, so two processes can
+        never both get it.
+
+        Args:
+            name: Lease name
+            owner: Identifier of the calling worker
+            seconds: How long the lease is held unless released or renewed
+
+        Returns:
+            True if ``owner`` now holds the lease
+        """
+        now = datetime.utcnow()
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            acquired = conn.execute("""
+                INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+            """, (name, owner, now + timedelta(seconds=seconds), now)).rowcount
+        conn.close()
+        return acquired > 0
+
+    def release_lease(self, name: str, owner: str) -> None:
+        """Release a lease held by ``owner`` (no-op if someone else holds it)."""
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+        conn.close()
+
+    def block_hashes(self, target: str) -> set:
+        """Return the hashes of the blocks stored for a target."""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT block_hash FROM blocks WHERE target = ?", (target,)).fetchall()
+        conn.close()
+        return {row[0] for row in rows}
+
+    def block_texts(self, target: str, block_hashes: List[str]) -> List[str]:
+        """Return the text of stored blocks, in the order they were on the page."""
+        conn = sqlite3.connect(self.db_path)
+        rows = [
+            conn.execute(
+                "SELECT position, text FROM blocks WHERE target = ? AND block_hash = ?", (target, block_hash)
+            ).fetchone()
+            for block_hash in block_hashes
+        ]
+        conn.close()
+        return [text for _, text in sorted(row for row in rows if row)]
+
+    def notified_blocks(self, target: str, channel: str) -> set:
+        """Return the (change type, block hash) changes of a target already delivered on a channel."""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT change_type, block_hash FROM block_notifications WHERE target = ? AND channel = ?",
+            (target, channel),
+        ).fetchall()
+        conn.close()
+        return set(rows)
+
+    def mark_blocks_notified(self, target: str, channel: str, changes: List[Tuple[str, str]]) -> None:
+        """Record (change type, block hash) changes of a target as delivered on a channel."""
+        now = datetime.utcnow()
+        conn = self._begin_write()
+        with conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO block_notifications ({', '.join(BLOCK_NOTIFICATION_COLUMNS)}) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(target, block, change_type, channel, now) for change_type, block in changes],
+            )
+        conn.close()
+
+    def save_blocks(self, target: str, blocks: List[Tuple[str, str]]) -> None:
+        """
+        Make a page's blocks the stored ones for its target.
+
+        Blocks already stored are left as they are (their position and
+        first_seen are those of when they appeared), so an unchanged region
+        costs one primary-key lookup per block. The target's delivered
+        changes are forgotten, since they were relative to the old blocks.
+
+        Args:
+            target: Target URL
+            blocks: (hash, text) of the page's blocks in document order
+        """
+        conn = self._begin_write()
+        with conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS current_blocks (block_hash TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.current_blocks")
+            conn.executemany(
+                "INSERT OR IGNORE INTO temp.current_blocks VALUES (?)", [(block,) for block, _ in blocks]
+            )
+            conn.execute("""
+                DELETE FROM blocks WHERE target = ?
+                AND block_hash NOT IN (SELECT block_hash FROM temp.current_blocks)
+            """, (target,))
+            now = datetime.utcnow()
+            conn.executemany(
+                f"INSERT OR IGNORE INTO blocks ({', '.join(BLOCK_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                [(target, block, position, text, now) for position, (block, text) in enumerate(blocks)],
+            )
+            conn.execute("DELETE FROM block_notifications WHERE target = ?", (target,))
+        conn.close()
+
+    def get_fetch_state(self, url: str) -> Optional[Dict[str, str]]:
+        """Return the HTTP validators and content hash of the last complete check."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT etag, last_modified, content_hash FROM fetch_state
+            WHERE url = ?
+        """, (url,))
+        row = cursor.fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def save_fetch_state(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        content_hash: Optional[str],
+    ) -> None:
+        """Remember validators and content hash once a check has fully completed."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO fetch_state (url, etag, last_modified, content_hash, checked_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                content_hash = excluded.content_hash,
+                checked_at = excluded.checked_at
+        """, (url, etag, last_modified, content_hash, datetime.utcnow()))
+        conn.commit()
+        conn.close()
+
+    def clear_fetch_state(self, url: str) -> None:
+        """Forget validators so the next check does a full fetch and parse."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM fetch_state WHERE url = ?", (url,))
+        conn.commit()
+        conn.close()
+
+    def query_jobs(
+        self,
+        city: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        min_wage: Optional[int] = None,
+        max_wage: Optional[int] = None,
+        text: Optional[str] = None,
+        include_archive: bool = True,
+        archive_path: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, object]]:
+        """
+        Filter jobs by the typed columns and full-text search over raw_text.
+
+        Args:
+            city: Exact city name
+            since: First listing date (inclusive)
+            until: Last listing date (inclusive)
+            min_wage: Lowest hourly wage in CZK (inclusive)
+            max_wage: Highest hourly wage in CZK (inclusive)
+            text: Words that must all start a word in the listing (diacritics ignored)
+            include_archive: Also search archived (expired) jobs
+            archive_path: Separate archive DB file, as passed to archive_expired
+            limit: Maximum number of rows
+
+        Returns:
+            Rows (QUERY_COLUMNS plus "duplicate_of" and "archived"), latest
+            listing date first; archived jobs have no duplicate_of
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        sources = [("main", "jobs", 0)]
+        if include_archive:
+            schema = "main"
+            if archive_path:
+                conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+                schema = "archive"
+            if conn.execute(
+                f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'jobs_archive'"
+            ).fetchone():
+                sources.append((schema, "jobs_archive", 1))
+
+        selects = []
+        params: list = []
+        for schema, table, archived in sources:
+            conditions = []
+            if city:
+                conditions.append("city = ?")
+                params.append(city)
+            if since:
+                conditions.append("date_iso >= ?")
+                params.append(since.isoformat())
+            if until:
+                conditions.append("date_iso <= ?")
+                params.append(until.isoformat())
+            if min_wage is not None:
+                conditions.append("wage_czk >= ?")
+                params.append(min_wage)
+            if max_wage is not None:
+                conditions.append("wage_czk <= ?")
+                params.append(max_wage)
+            if text:
+                fts = f"{table}_fts"
+                if conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = ?", (fts,)).fetchone():
+                    conditions.append(f"rowid IN (SELECT rowid FROM {schema}.{fts} WHERE {fts} MATCH ?)")
+                    params.append(fts_query(text))
+                else:
+                    for word in text.split():
+                        conditions.append("raw_text LIKE ?")
+                        params.append(f"%{word}%")
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            duplicate_of = "NULL" if archived else "duplicate_of"
+            selects.append(
+                f"SELECT {', '.join(QUERY_COLUMNS)}, {duplicate_of} AS duplicate_of, {archived} AS archived "
+                f"FROM {schema}.{table} {where}"
+            )
+
+        sql = (
+            f"SELECT * FROM ({' UNION ALL '.join(selects)}) "
+            "ORDER BY date_iso IS NULL, date_iso DESC, city, title LIMIT ?"
+        )
+        rows = conn.execute(sql, params + [limit]).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def rollup_stats(
+        self,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        city: Optional[str] = None,
+        by: str = "city",
+    ) -> List[Dict[str, object]]:
+        """
+        Summarize posted jobs from the rollup tables only (no scan of jobs).
+
+        Args:
+            since: First listing date (inclusive)
+            until: Last listing date (inclusive)
+            city: Only this city
+            by: Group rows by "city" or "day"
+
+        Returns:
+            One row per group with "posted", "active", "hours", "weekend_hours",
+            "mean_wage" and "median_wage", ordered by the group
+        """
+        if by not in ("city", "day"):
+            raise ValueError(f"Cannot group stats by {by!r}")
+        conditions, params = ["day != ''"], []
+        if since:
+            conditions.append("day >= ?")
+            params.append(since.isoformat())
+        if until:
+            conditions.append("day <= ?")
+            params.append(until.isoformat())
+        if city:
+            conditions.append("city = ?")
+            params.append(city)
+        where = " AND ".join(conditions)
+
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(f"""
+            SELECT {by}, SUM(posted), SUM(active), TOTAL(hours),
+                TOTAL(CASE WHEN strftime('%w', day) IN ('0', '6') THEN hours END),
+                TOTAL(wage_total), SUM(wage_jobs)
+            FROM rollup_daily WHERE {where} GROUP BY {by} ORDER BY {by}
+        """, params).fetchall()
+        histograms: Dict[str, List[Tuple[int, int]]] = {}
+        for group, wage, count in conn.execute(f"""
+            SELECT {by}, wage_czk, SUM(jobs) FROM rollup_wages
+            WHERE {where} GROUP BY {by}, wage_czk ORDER BY {by}, wage_czk
+        """, params):
+            histograms.setdefault(group, []).append((wage, count))
+        conn.close()
+
+        return [
+            {
+                by: group,
+                "posted": posted,
+                "active": active,
+                "hours": hours,
+                "weekend_hours": weekend_hours,
+                "mean_wage": wage_total / wage_jobs if wage_jobs else None,
+                "median_wage": histogram_median(histograms.get(group, [])),
+            }
+            for group, posted, active, hours, weekend_hours, wage_total, wage_jobs in rows
+        ]
+
+    def dump_live_state(self, cutoff: date) -> Dict[str, List[tuple]]:
+        """
+        Return the rows needed to resume watching, without history.
+
+        Args:
+            cutoff: Jobs dated before this day are left out as expired
+
+        Returns:
+            Dictionary with "jobs", "notifications", "fetch_state", "blocks",
+            "block_notifications", "rollup_daily" and "rollup_wages" row
+            lists (columns as in LIVE_JOB_COLUMNS, NOTIFICATION_COLUMNS,
+            FETCH_STATE_COLUMNS, BLOCK_COLUMNS, BLOCK_NOTIFICATION_COLUMNS
+            and the ROLLUP_*_COLUMNS).
+            The ledger keeps one row per job, change type and channel; the rollups keep
+            all history since they are small.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(f"SELECT {', '.join(LIVE_JOB_COLUMNS)} FROM jobs")
+        jobs = [row for row in cursor.fetchall() if not is_expired(row[3], cutoff)]
+        live_keys = {row[0] for row in jobs}
+
+        cursor.execute("""
+            SELECT job_key, change_type, MIN(notified_at), channel FROM notifications
+            GROUP BY job_key, change_type, channel
+        """)
+        notifications = [row for row in cursor.fetchall() if row[0] in live_keys]
+
+        cursor.execute(f"SELECT {', '.join(FETCH_STATE_COLUMNS)} FROM fetch_state")
+        fetch_state = cursor.fetchall()
+        cursor.execute(f"SELECT {', '.join(BLOCK_COLUMNS)} FROM blocks")
+        blocks = cursor.fetchall()
+        cursor.execute(f"SELECT {', '.join(BLOCK_NOTIFICATION_COLUMNS)} FROM block_notifications")
+        block_notifications = cursor.fetchall()
+
+        cursor.execute(f"SELECT {', '.join(ROLLUP_DAILY_COLUMNS)} FROM rollup_daily")
+        rollup_daily = cursor.fetchall()
+        cursor.execute(f"SELECT {', '.join(ROLLUP_WAGES_COLUMNS)} FROM rollup_wages")
+        rollup_wages = cursor.fetchall()
+
+        conn.close()
+        return {
+            "jobs": jobs,
+            "notifications": notifications,
+            "fetch_state": fetch_state,
+            "blocks": blocks,
+            "block_notifications": block_notifications,
+            "rollup_daily": rollup_daily,
+            "rollup_wages": rollup_wages,
+        }
+
+    def bulk_load(self, state: Dict[str, List[tuple]], replace: bool = True) -> None:
+        """
+        Load rows produced by dump_live_state in a single transaction.
+
+        Args:
+            state: Dictionary with "jobs", "notifications" and "fetch_state" rows,
+                and optionally "blocks", "block_notifications" and "rollup_daily" /
+                "rollup_wages"; without rollups
+                they are recomputed from the loaded jobs. A job's "active"
+                flag may be None (snapshots that predate it) and then counts
+                as active; likewise a missing target is "", a missing
+                duplicate_of is None and a ledger row without a channel was email.
+            replace: Clear the existing jobs, ledger, fetch state and blocks first
+        """
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            if replace:
+                conn.execute("DELETE FROM notifications")
+                conn.execute("DELETE FROM notification_claims")
+                conn.execute("DELETE FROM jobs")
+                conn.execute("DELETE FROM fetch_state")
+                conn.execute("DELETE FROM blocks")
+                conn.execute("DELETE FROM block_notifications")
+            columns = LIVE_JOB_COLUMNS + TYPED_COLUMNS
+            active = len(JOB_COLUMNS)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                (
+                    tuple(row[:active])
+                    + (1 if row[active] is None else row[active], row[active + 1] or "", row[active + 2])
+                    + typed_values(row[3], row[6], row[7])
+                    for row in state.get("jobs", [])
+                ),
+            )
+            conn.executemany(
+                f"INSERT OR IGNORE INTO notifications ({', '.join(NOTIFICATION_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(NOTIFICATION_COLUMNS))})",
+                (tuple(row[:-1]) + (row[-1] or "email",) for row in state.get("notifications", [])),
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO fetch_state ({', '.join(FETCH_STATE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(FETCH_STATE_COLUMNS))})",
+                state.get("fetch_state", []),
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO blocks ({', '.join(BLOCK_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(BLOCK_COLUMNS))})",
+                state.get("blocks", []),
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO block_notifications ({', '.join(BLOCK_NOTIFICATION_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(BLOCK_NOTIFICATION_COLUMNS))})",
+                state.get("block_notifications", []),
+            )
+            if self.full_text:
+                conn.execute("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')")
+            if state.get("rollup_daily"):
+                conn.execute("DELETE FROM rollup_daily")
+                conn.execute("DELETE FROM rollup_wages")
+                for table, columns in (("rollup_daily", ROLLUP_DAILY_COLUMNS), ("rollup_wages", ROLLUP_WAGES_COLUMNS)):
+                    conn.executemany(
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        state.get(table, []),
+                    )
+            else:
+                self._rebuild_rollups(conn)
+        conn.close()
+
+    def _create_archive_tables(self, conn: sqlite3.Connection, schema: str) -> None:
+        """Create the archive tables in the given schema ("main" or an attached DB)."""
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.jobs_archive (
+                job_key TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                city TEXT NOT NULL,
+                date TEXT,
+                day_of_week TEXT,
+                time_range TEXT,
+                duration_hours TEXT,
+                wage_czk_per_h TEXT,
+                raw_text TEXT NOT NULL,
+                first_seen TIMESTAMP NOT NULL,
+                last_seen TIMESTAMP NOT NULL,
+                archived_at TIMESTAMP NOT NULL,
+                date_iso TEXT,
+                wage_czk INTEGER,
+                hours REAL
+            )
+        """)
+        self._add_typed_columns(conn, schema, "jobs_archive")
+        self._create_search_indexes(conn, schema, "jobs_archive")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.notifications_archive (
+                notification_id INTEGER PRIMARY KEY,
+                job_key TEXT NOT NULL,
+                change_type TEXT NOT NULL,
+                notified_at TIMESTAMP NOT NULL,
+                archived_at TIMESTAMP NOT NULL,
+                channel TEXT NOT NULL DEFAULT 'email'
+            )
+        """)
+        columns = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info(notifications_archive)")}
+        if "channel" not in columns:
+            conn.execute(f"ALTER TABLE {schema}.notifications_archive ADD COLUMN channel TEXT NOT NULL DEFAULT 'email'")
+
+    def archive_expired(self, cutoff: date, archive_path: Optional[str] = None) -> Dict[str, int]:
+        """
+        Move expired jobs and their notification rows out of the hot tables.
+
+        Args:
+            cutoff: Jobs dated before this day are archived
+            archive_path: Separate archive DB file; if not given, the rows go to
+                jobs_archive / notifications_archive tables in this DB
+
+        Returns:
+            Number of archived rows per table ("jobs", "notifications")
+        """
+        # ATTACH cannot run inside a transaction, so this one is begun by hand below
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        schema = "main"
+        if archive_path:
+            conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+            schema = "archive"
+
+        # Undated jobs have no date_iso and never expire, as in is_expired
+        expired = conn.execute("SELECT job_key FROM jobs WHERE date_iso < ?", (cutoff.isoformat(),)).fetchall()
+        if not expired:
+            conn.close()
+            return {"jobs": 0, "notifications": 0}
+
+        self._create_archive_tables(conn, schema)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS expired_keys (job_key TEXT PRIMARY KEY)")
+        job_columns = ", ".join(JOB_COLUMNS + TYPED_COLUMNS)
+        expired_filter = "job_key IN (SELECT job_key FROM temp.expired_keys)"
+        now = datetime.utcnow()
+
+        # One transaction across both DBs: rows are either moved or left alone
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            conn.execute("DELETE FROM temp.expired_keys")
+            conn.executemany("INSERT OR IGNORE INTO temp.expired_keys VALUES (?)", expired)
+            # Re-archived keys are replaced, so drop their old text from the index first
+            self._unindex_text(conn, schema, "jobs_archive", expired_filter)
+            conn.execute(f"""
+                INSERT OR REPLACE INTO {schema}.jobs_archive ({job_columns}, archived_at)
+                SELECT {job_columns}, ? FROM main.jobs WHERE {expired_filter}
+            """, (now,))
+            self._index_text(conn, schema, "jobs_archive", expired_filter)
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {schema}.notifications_archive
+                    (notification_id, job_key, change_type, notified_at, channel, archived_at)
+                SELECT notification_id, job_key, change_type, notified_at, channel, ?
+                FROM main.notifications WHERE {expired_filter}
+            """, (now,))
+            notifications = conn.execute(f"DELETE FROM main.notifications WHERE {expired_filter}").rowcount
+            conn.execute(f"DELETE FROM main.notification_claims WHERE {expired_filter}")
+            self._unindex_text(conn, "main", "jobs", expired_filter)
+            # Archived jobs stay in the rollups as posted, but are no longer listed
+            self._count_active(conn, f"active = 1 AND {expired_filter}", (), -1)
+            jobs = conn.execute(f"DELETE FROM main.jobs WHERE {expired_filter}").rowcount
+
+        conn.close()
+        return {"jobs": jobs, "notifications": notifications}
+
+    def compact(self, max_pages: int = 256) -> int:
+        """
+        Return up to max_pages free pages to the filesystem.
+
+        Uses incremental vacuum so each call does a bounded amount of work.
+        A DB created before auto_vacuum was enabled is converted once with a
+        full VACUUM.
+
+        Returns:
+            Number of pages released
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # executescript steps the pragma to completion (execute frees one page)
+        conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.close()
+        return before - after